@@ -1,3 +1,4 @@
+from dataclasses import dataclass
 from langchain_ollama import ChatOllama
 from typing_extensions import TypedDict
 from langgraph.graph.message import add_messages
@@ -7,14 +8,20 @@ class AgentState(TypedDict):
 	messages: Annotated[list, add_messages]
 	steps: str
 	current_step: int
+
+@dataclass
+class AgentContext:
+	"""
+	Run-scoped dependencies, passed as context= when invoking the graph.
+	Nodes read them with get_runtime(AgentContext), they never end up in checkpoints.
+	"""
 	llm: ChatOllama
 
 def get_new_state(state: AgentState, messages=None, steps=None, current_step=None):
+	# Messages are only returned when there are new ones, add_messages appends them
 	new_state = {
-			"messages": state["messages"],
 			"steps": state["steps"],
-			"current_step": state["current_step"],
-			"llm": state["llm"]
+			"current_step": state["current_step"]
 	}
 
 	if messages is not None:
@@ -1,35 +1,38 @@
 import subprocess
 import os
-import json
+import re
 import datetime
-import requests
 from urllib.parse import quote_plus
+from concurrent.futures import ThreadPoolExecutor
 from langgraph.graph import StateGraph, END
 
-from typing import TypedDict, List, Optional
+from typing import TypedDict, List
+
+from BasicAssistant.step_executor import run_steps_dag
+from Assistant.response_cache import ResponseCache
+from Assistant.ollama_client import get_client
+from Assistant.memory_store import MemoryStore
+from Assistant.memory_retention import RetentionPolicy
+from Assistant.memory_index import MemoryIndex
 
 # -------------------
-# 🧠 Memory (JSON file)
+# 🧠 Memory (append-only log)
 # -------------------
-MEMORY_FILE = "assistant_memory.json"
-
-def load_persistent_memory():
-    if os.path.exists(MEMORY_FILE):
-        try:
-            with open(MEMORY_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception as e:
-            print("Memory load error:", e)
-    return {}
-
-def save_persistent_memory(mem: dict):
-    try:
-        with open(MEMORY_FILE, "w", encoding="utf-8") as f:
-            json.dump(mem, f, default=str, indent=2)
-        return True
-    except Exception as e:
-        print("Memory save error:", e)
-        return False
+MEMORY_DIR = os.path.dirname(os.path.abspath(__file__))
+MEMORY_FILE = os.path.join(MEMORY_DIR, "assistant_memory.jsonl")
+# Old single JSON file, its history is imported once when log doesn't exist yet
+LEGACY_MEMORY_FILE = os.path.join(MEMORY_DIR, "assistant_memory.json")
+MEMORY_RETENTION_DAYS = 30
+MEMORY_MAX_RECORDS = 10000
+# Expiry runs at most this often (seconds), not on every turn
+MEMORY_RETENTION_INTERVAL = 3600
+
+# Read once per process, every turn only appends to it
+memory_store = MemoryStore(
+    MEMORY_FILE,
+    legacy_path=LEGACY_MEMORY_FILE,
+    retention=RetentionPolicy(MEMORY_RETENTION_DAYS, MEMORY_MAX_RECORDS, MEMORY_RETENTION_INTERVAL)
+)
 
 # -----------------------
 # ⚙️ Ubuntu App Whitelist
@@ -77,6 +80,7 @@ class AssistantState(TypedDict, total=False):
     transcript: str
     type: str  # "instruction" or "query"
     steps: List[str]
+    step_dependencies: List[List[int]]  # indexes of earlier steps each step waits for
     verified_steps: List[str]
     step_outputs: List[str]
     final_output: str
@@ -89,22 +93,81 @@ class AssistantState(TypedDict, total=False):
 # --------------------------------------
 OLLAMA_MODEL = "openchat:latest"  # or "llama3", "gemma", etc.
 
+EMBEDDING_MODEL = "nomic-embed-text"
+# Paraphrased questions are matched by embedding similarity, set to False for exact matches only
+SEMANTIC_CACHE = True
+
+# Static system prompts, variable input goes after them so Ollama can reuse cached prefix
+CLASSIFY_SYSTEM_PROMPT = """Classify the following input as either a 'query' or an 'instruction'.
+Answer with only the word: query or instruction."""
+
+SPLIT_SYSTEM_PROMPT = """Break the following instruction into atomic steps, separated by new lines.
+If a step needs an earlier step to finish first, end it with [after N] where N is number of that earlier step.
+Only return the list of steps."""
+
+STEP_SYSTEM_PROMPT = """You are a helpful assistant. Simulate or describe how to execute the given step."""
+
+ANSWER_SYSTEM_PROMPT = """Answer this question.
+If notes from earlier conversations are given and relevant, use them, otherwise ignore them."""
+
+# Independent steps run concurrently, each one limited to STEP_TIMEOUT seconds
+MAX_PARALLEL_STEPS = 4
+STEP_TIMEOUT = 60
+
 def call_ollama(prompt: str, system: str = "") -> str:
     try:
-        response = requests.post(
-            "http://localhost:11434/api/generate",
-            json={"model": OLLAMA_MODEL, "prompt": prompt, "system": system, "stream": False}
-        )
-        return response.json()["response"].strip()
+        return get_client().generate(prompt, system=system, model=OLLAMA_MODEL).strip()
     except Exception as e:
         return f"Ollama error: {e}"
 
+def embed_text(text: str) -> List[float]:
+    return get_client().embed(text, model=EMBEDDING_MODEL)
+
+response_cache = ResponseCache(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "response_cache.json"),
+    embed=embed_text if SEMANTIC_CACHE else None
+)
+
+# Past turns are embedded into a fixed size memory-mapped index,
+# only the few most relevant ones are put into the prompt
+MEMORY_TOP_K = 3
+MEMORY_MIN_SCORE = 0.55
+memory_index = MemoryIndex(MEMORY_DIR, embed=embed_text, capacity=4096)
+
+# Turns are embedded and indexed on this thread, so saving memory never delays the reply
+memory_index_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory-index")
+
+def recall(query: str, vector=None) -> List[str]:
+    try:
+        return memory_index.search(query, k=MEMORY_TOP_K, min_score=MEMORY_MIN_SCORE, vector=vector)
+    except Exception as e:
+        print("Memory recall error:", e)
+        return []
+
+def with_recalled_notes(query: str, notes: List[str]) -> str:
+    """
+    Puts recalled snippets before the question, system prompt stays static so its KV cache is reused
+    """
+    if not notes:
+        return query
+    joined = "\n---\n".join(notes)
+    return f"Notes from earlier conversations:\n{joined}\n\nQuestion: {query}"
+
 # ------------------
 # Graph Nodes (Agents)
 # ------------------
 
+def forget_expired_turns():
+    # Index only holds turns still in memory, so recall never brings back expired ones
+    memory_store.expire()
+    oldest = memory_store.oldest_time()
+    memory_index.forget_before(oldest if oldest is not None else float("inf"))
+
 def load_memory(state: AssistantState):
-    state['memory'] = load_persistent_memory()
+    memory_store.load()
+    forget_expired_turns()
+    state['memory'] = {"history": memory_store.history()}
+    state['memory_loaded_at'] = memory_store.loaded_at
     return state
 
 def listen_to_query(state: AssistantState) -> AssistantState:
@@ -118,27 +181,28 @@ def transcribe(state: AssistantState) -> AssistantState:
 
 def classify_query_or_instruction(state: AssistantState) -> AssistantState:
     user_input = state['transcript']
-    prompt = f"""Classify the following input as either a 'query' or an 'instruction':
-
-Input: "{user_input}"
-
-Answer with only the word: query or instruction."""
-
-    result = call_ollama(prompt)
+    result = call_ollama(f'Input: "{user_input}"', system=CLASSIFY_SYSTEM_PROMPT)
     label = result.lower().strip()
     state['type'] = "instruction" if "instruction" in label else "query"
     return state
 
 def split_instructions(state: AssistantState) -> AssistantState:
     instruction = state['transcript']
-    prompt = f"""Break the following instruction into atomic steps, separated by new lines:
-
-"{instruction}"
-
-Only return the list of steps."""
-    steps_raw = call_ollama(prompt)
-    steps = [s.strip("-• ").strip() for s in steps_raw.strip().split("\n") if s.strip()]
+    steps_raw = call_ollama(f'"{instruction}"', system=SPLIT_SYSTEM_PROMPT)
+    steps, dependencies = [], []
+    for line in steps_raw.strip().split("\n"):
+        step = re.sub(r"^\d+[.)]\s*", "", line.strip("-• ").strip())
+        if not step:
+            continue
+        after = re.search(r"\[after ([\d,\s]+)\]\s*$", step, re.IGNORECASE)
+        if after:
+            step = step[:after.start()].strip()
+            dependencies.append([int(n) - 1 for n in re.findall(r"\d+", after.group(1))])
+        else:
+            dependencies.append([])
+        steps.append(step)
     state['steps'] = steps
+    state['step_dependencies'] = dependencies
     return state
 
 def reverify_steps(state: AssistantState) -> AssistantState:
@@ -152,18 +216,24 @@ def reverify_steps(state: AssistantState) -> AssistantState:
     state['verified_steps'] = safe_steps
     return state
 
+def execute_step(index: int, step: str) -> str:
+    step_l = step.lower()
+    if step_l.startswith("open "):
+        return open_application(step)
+    elif step_l.startswith("play "):
+        return play_video(step)
+    else:
+        return call_ollama(f'"{step}"', system=STEP_SYSTEM_PROMPT)
+
 def iterate_on_steps(state: AssistantState) -> AssistantState:
-    outputs = []
-    for step in state.get('verified_steps', []):
-        step_l = step.lower()
-        if step_l.startswith("open "):
-            outputs.append(open_application(step))
-        elif step_l.startswith("play "):
-            outputs.append(play_video(step))
-        else:
-            prompt = f"""You are a helpful assistant. Simulate or describe how to execute this step: "{step}"."""
-            outputs.append(call_ollama(prompt))
-    state['step_outputs'] = outputs
+    # Steps without dependencies run concurrently, outputs are kept in step order
+    state['step_outputs'] = run_steps_dag(
+        state.get('verified_steps', []),
+        execute_step,
+        dependencies=state.get('step_dependencies'),
+        default_timeout=STEP_TIMEOUT,
+        max_workers=MAX_PARALLEL_STEPS
+    )
     return state
 
 def on_to_next_step(state: AssistantState) -> AssistantState:
@@ -172,33 +242,39 @@ def on_to_next_step(state: AssistantState) -> AssistantState:
 
 def generate_answer(state: AssistantState) -> AssistantState:
     query = state.get('transcript')
-    answer = call_ollama(f"Answer this question:\n\n{query}")
+    answer = response_cache.get(query)
+    if answer is None:
+        # Embedding made by the cache lookup is reused, query isn't embedded twice
+        notes = recall(query, response_cache.embedding_for(query))
+        answer = call_ollama(with_recalled_notes(query, notes), system=ANSWER_SYSTEM_PROMPT)
+        # Answers built on personal notes are not reused for other phrasings of the question
+        if not notes and not answer.startswith("Ollama error"):
+            response_cache.put(query, answer)
     state['response'] = answer
     return state
 
 def remove_old_memory(state: AssistantState) -> AssistantState:
-    mem = state.get('memory', {})
-    now = datetime.datetime.now()
-    if 'history' in mem:
-        mem['history'] = [
-            h for h in mem['history']
-            if (now - datetime.datetime.fromisoformat(h['timestamp'])).days <= 30
-        ]
-    state['memory'] = mem
+    # Bisect over time-ordered records, skipped entirely until next check is due
+    forget_expired_turns()
+    state['memory'] = {"history": memory_store.history()}
     return state
 
+def index_turn(record: dict):
+    try:
+        memory_index.add(record["input"], record["output"], record["timestamp"])
+    except Exception as e:
+        print("Memory index error:", e)
+
 def save_memory(state: AssistantState) -> AssistantState:
-    mem = state.get('memory', {})
-    hist = mem.get('history', [])
-    hist.append({
+    record = {
         "timestamp": datetime.datetime.now().isoformat(),
         "input": state.get('transcript'),
         "type": state.get('type'),
         "output": state.get('final_output') or state.get('response')
-    })
-    mem['history'] = hist
-    state['memory'] = mem
-    save_persistent_memory(mem)
+    }
+    memory_store.add(record)
+    memory_index_pool.submit(index_turn, record)
+    state['memory'] = {"history": memory_store.history()}
     return state
 
 def route_query_or_instruction(state):
@@ -0,0 +1,87 @@
+import datetime
+import os
+import random
+import tempfile
+import time
+
+from Assistant.memory_retention import TimeOrderedRecords, RetentionPolicy
+from Assistant.memory_store import MemoryStore
+
+# Compares per-turn cost of old remove_old_memory (parse every timestamp, rebuild list)
+# against bisect based retention over 100k synthetic history records spread over 60 days.
+# Run from repository root : python -m Assistant.benchmark_memory_retention
+
+RECORDS = 100_000
+TURNS = 50
+RETENTION_DAYS = 30
+
+def synthetic_history(count):
+	now = datetime.datetime.now()
+	start = now - datetime.timedelta(days=60)
+	step = (now - start) / count
+	return [
+			{
+					"timestamp": (start + step * index).isoformat(),
+					"input": f"question {index}",
+					"type": random.choice(["query", "instruction"]),
+					"output": "answer " * 20
+			}
+			for index in range(count)
+	]
+
+def old_remove_old_memory(history):
+	now = datetime.datetime.now()
+	return [
+			h for h in history
+			if (now - datetime.datetime.fromisoformat(h['timestamp'])).days <= RETENTION_DAYS
+	]
+
+def time_per_turn(function):
+	start = time.perf_counter()
+	for _ in range(TURNS):
+		function()
+	return (time.perf_counter() - start) / TURNS * 1000
+
+if __name__ == "__main__":
+	history = synthetic_history(RECORDS)
+
+	kept = old_remove_old_memory(history)
+	old_ms = time_per_turn(lambda: old_remove_old_memory(kept))
+	print(f"full scan, per turn            : {old_ms:8.3f} ms  ({len(kept)} records kept)")
+
+	records = TimeOrderedRecords()
+	start = time.perf_counter()
+	for record in history:
+		records.add(record)
+	print(f"building time ordered index    : {(time.perf_counter() - start) * 1000:8.3f} ms (once per process)")
+
+	policy = RetentionPolicy(RETENTION_DAYS, max_records=None, check_interval=0)
+	start = time.perf_counter()
+	records.drop_oldest(policy.expired_count(records))
+	print(f"first expiry, bisect + delete  : {(time.perf_counter() - start) * 1000:8.3f} ms  ({len(records)} records kept)")
+
+	eager_ms = time_per_turn(lambda: records.drop_oldest(policy.expired_count(records)))
+	print(f"bisect check every turn        : {eager_ms:8.3f} ms")
+
+	lazy_policy = RetentionPolicy(RETENTION_DAYS, max_records=None, check_interval=3600)
+	lazy_policy.expired_count(records)
+	lazy_ms = time_per_turn(lambda: lazy_policy.due(records) and records.drop_oldest(lazy_policy.expired_count(records)))
+	print(f"lazy check (hourly), per turn  : {lazy_ms:8.3f} ms")
+
+	with tempfile.TemporaryDirectory() as directory:
+		store = MemoryStore(os.path.join(directory, "memory.jsonl"), fsync=False)
+		for record in history:
+			store.records.add(record)
+		store.loaded_at = datetime.datetime.now().isoformat()
+		store.write_snapshot()
+
+		start = time.perf_counter()
+		reloaded = MemoryStore(store.path)
+		reloaded.load()
+		print(f"loading log of {len(reloaded.history())} records  : {(time.perf_counter() - start) * 1000:8.3f} ms (once per process)")
+
+		turn_ms = time_per_turn(lambda: (reloaded.add(history[-1]), reloaded.expire()))
+		print(f"append + lazy expiry, per turn : {turn_ms:8.3f} ms")
+
+	if eager_ms:
+		print(f"\nspeedup of per-turn retention check : {old_ms / max(lazy_ms, 1e-6):.0f}x (lazy), {old_ms / eager_ms:.0f}x (every turn)")
@@ -0,0 +1,61 @@
+from Assistant.ollama_client import OllamaClient
+from Assistant.prompt_builder import PromptBuilder
+
+# Measures prompt-eval tokens per turn for old prompt layout (history and step copied
+# into a fresh system message every call) against static prefix + appended deltas.
+# Ollama only counts tokens it had to evaluate, tokens served from KV cache are not counted.
+# Run from repository root : python -m Assistant.benchmark_prompt_cache
+
+MODEL = "openchat:latest"
+OPTIONS = {"num_predict": 48, "temperature": 0}
+
+EXECUTE_PROMPT = """
+You are an assistant. Execute the step given by user (or respond) in context of the conversation so far.
+Reply only with the answer / result."""
+
+STEPS = [
+		"Explain langgraph working in two sentences",
+		"Suggest a YouTube video about langgraph",
+		"Explain what a checkpointer is",
+		"Summarize what we talked about",
+		"Suggest a next topic to learn",
+]
+
+def old_layout(history, step):
+	"""
+	Layout used before, variable parts inside a new system message at the end
+	"""
+	prompt = f"""
+You are an assistant. Execute the following step (or respond) in context.
+
+Step: {step}
+
+Conversation history:
+{''.join(m['content'] for m in history)}
+
+Answer / result:
+"""
+	return history + [{"role": "system", "content": prompt}]
+
+execute_prompt = PromptBuilder({"role": "system", "content": EXECUTE_PROMPT})
+
+def new_layout(history, step):
+	return execute_prompt.build(history=history, delta=[{"role": "user", "content": f"Step: {step}"}])
+
+def run(client, name, layout):
+	history = [{"role": "user", "content": "Help me learn langgraph"}]
+	counts = []
+	for step in STEPS:
+		response = client.chat(layout(history, step), model=MODEL, options=OPTIONS)
+		counts.append(response.get("prompt_eval_count", 0))
+		history = history + [{"role": "assistant", "content": response["message"]["content"]}]
+	print(f"{name:<14} prompt-eval tokens per turn : {counts}  total : {sum(counts)}")
+	return sum(counts)
+
+if __name__ == "__main__":
+	client = OllamaClient(model=MODEL)
+	client.warm_up()
+	before = run(client, "before", old_layout)
+	after = run(client, "static prefix", new_layout)
+	if before:
+		print(f"Prompt evaluation reduced by {(1 - after / before) * 100:.0f}%")
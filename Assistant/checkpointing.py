@@ -0,0 +1,142 @@
+import os
+import sqlite3
+import uuid
+import zlib
+from typing import Any, List, Optional, Tuple
+
+from langchain_core.messages import BaseMessage, RemoveMessage, SystemMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+CHECKPOINT_DIR = os.path.dirname(os.path.abspath(__file__))
+# "sqlite" keeps checkpoints on disk and resumes after restart, "memory" keeps them in RAM only
+CHECKPOINTER = os.getenv("CHECKPOINTER", "sqlite")
+# Checkpoints kept per thread, older ones are deleted as new ones are written
+CHECKPOINTS_TO_KEEP = 20
+# Non-system messages kept in a thread, older ones are removed from state so checkpoints stay flat
+MESSAGE_WINDOW = 20
+
+COMPRESSED_PREFIX = "zlib+"
+
+class CompactSerializer(JsonPlusSerializer):
+	"""
+	JsonPlusSerializer whose larger payloads are zlib compressed.
+
+	Message lists make up most of a checkpoint and compress well, small
+	values are stored as they are. Compressed payloads are tagged through
+	their type name, so uncompressed checkpoints still load.
+	"""
+	def __init__(self, min_size: int = 256, level: int = 6):
+		super().__init__()
+		self.min_size = min_size
+		self.level = level
+
+	def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+		type_name, data = super().dumps_typed(obj)
+		if data is not None and len(data) >= self.min_size:
+			return COMPRESSED_PREFIX + type_name, zlib.compress(data, self.level)
+		return type_name, data
+
+	def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+		type_name, payload = data
+		if type_name.startswith(COMPRESSED_PREFIX):
+			return super().loads_typed((type_name[len(COMPRESSED_PREFIX):], zlib.decompress(payload)))
+		return super().loads_typed(data)
+
+class PruningSqliteSaver(SqliteSaver):
+	"""
+	SqliteSaver which keeps only the newest checkpoints of every thread.
+
+	Checkpoint ids are time ordered, so after every put everything but the
+	newest keep_last checkpoints of that thread, and their pending writes,
+	are deleted. SQLite reuses freed pages, database file stays flat over a
+	long session instead of growing with every super-step.
+	"""
+	def __init__(self, conn: sqlite3.Connection, keep_last: int = CHECKPOINTS_TO_KEEP, serde=None):
+		super().__init__(conn, serde=serde or CompactSerializer())
+		self.keep_last = keep_last
+
+	def put(self, config, checkpoint, metadata, new_versions):
+		saved_config = super().put(config, checkpoint, metadata, new_versions)
+		configurable = saved_config["configurable"]
+		self.prune(configurable["thread_id"], configurable.get("checkpoint_ns", ""))
+		return saved_config
+
+	def latest_thread_id(self) -> Optional[str]:
+		with self.cursor(transaction=False) as cur:
+			cur.execute("SELECT thread_id FROM checkpoints ORDER BY checkpoint_id DESC LIMIT 1")
+			row = cur.fetchone()
+		return row[0] if row else None
+
+	def prune(self, thread_id: str, checkpoint_ns: str = ""):
+		with self.cursor() as cur:
+			cur.execute(
+					"""DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN (
+						SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?
+						ORDER BY checkpoint_id DESC LIMIT ?)""",
+					(str(thread_id), checkpoint_ns, str(thread_id), checkpoint_ns, self.keep_last)
+			)
+			cur.execute(
+					"""DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id NOT IN (
+						SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?)""",
+					(str(thread_id), checkpoint_ns, str(thread_id), checkpoint_ns)
+			)
+
+def open_checkpointer(name: str, keep_last: int = CHECKPOINTS_TO_KEEP):
+	"""
+	Checkpointer selected by CHECKPOINTER
+	:param name: database file name, stored next to this module
+	:param keep_last: checkpoints kept per thread
+	:return:
+	"""
+	if CHECKPOINTER == "memory":
+		return MemorySaver()
+	conn = sqlite3.connect(os.path.join(CHECKPOINT_DIR, name), check_same_thread=False)
+	return PruningSqliteSaver(conn, keep_last=keep_last)
+
+def trim_messages(messages: List[BaseMessage], keep_last: int = MESSAGE_WINDOW) -> List[RemoveMessage]:
+	"""
+	Removals for every non-system message except the newest keep_last,
+	returned along with a node's new messages so add_messages drops them from state
+	:param messages: messages currently in state
+	:param keep_last:
+	:return:
+	"""
+	conversation = [m for m in messages if not isinstance(m, SystemMessage)]
+	old = conversation[:-keep_last] if keep_last > 0 else conversation
+	return [RemoveMessage(id=m.id) for m in old if m.id is not None]
+
+def has_unfinished_run(graph, config) -> bool:
+	"""
+	Whether thread stopped halfway through a run (crash or Ctrl+C), which can be resumed
+	by streaming None as input
+	:param graph: compiled graph
+	:param config:
+	:return:
+	"""
+	return bool(graph.get_state(config).next)
+
+def open_thread(graph, checkpointer):
+	"""
+	Picks thread for this process: latest thread if its run was interrupted, otherwise a new one
+	:param graph: compiled graph
+	:param checkpointer:
+	:return: config and whether it resumes an interrupted run
+	"""
+	if isinstance(checkpointer, PruningSqliteSaver):
+		thread_id = checkpointer.latest_thread_id()
+		if thread_id is not None:
+			config = {"configurable": {"thread_id": thread_id}}
+			if has_unfinished_run(graph, config):
+				return config, True
+	return {"configurable": {"thread_id": uuid.uuid4().hex}}, False
+
+def finish_thread(checkpointer, config):
+	"""
+	Deletes checkpoints of a run which completed, there is nothing left to resume
+	:param checkpointer:
+	:param config:
+	:return:
+	"""
+	checkpointer.delete_thread(config["configurable"]["thread_id"])
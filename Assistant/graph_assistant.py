@@ -6,7 +6,9 @@ from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from langchain_ollama.chat_models import ChatOllama  # you can swap your LLM
 from langgraph.graph import StateGraph, START, END, MessagesState
 from langgraph.graph.message import add_messages
-from langgraph.checkpoint.memory import MemorySaver
+
+from prompt_builder import PromptBuilder
+from checkpointing import open_checkpointer, open_thread, finish_thread
 
 
 # ——— Define the state used by nodes —————————————————————
@@ -17,20 +19,26 @@ class AgentState(MessagesState):
     results: Annotated[dict[int, Any], Any]
 
 
+# ——— Prompts: static prefixes, history and new input are appended after them ———
+# Keeping the prefix byte identical lets Ollama reuse KV cache between calls
+PLAN_PROMPT = """
+You are a decomposition assistant. Given the instruction, break it down into ordered, numbered steps.
+Reply only with the steps."""
+
+EXECUTE_PROMPT = """
+You are an assistant. Execute the step given by user (or respond) in context of the conversation so far.
+Reply only with the answer / result."""
+
+plan_prompt = PromptBuilder(SystemMessage(content=PLAN_PROMPT))
+execute_prompt = PromptBuilder(SystemMessage(content=EXECUTE_PROMPT))
+
+
 # ——— Tool node: decompose instruction into steps —————————
 def plan_steps(state: AgentState) -> AgentState:
     messages = state["messages"]
     # prompt the LLM to decompose last user instruction into ordered steps
-    instruction = messages[-1].content  # assuming last message is user
-    prompt = f"""
-You are a decomposition assistant. Given the instruction, break it down into ordered, numbered steps.
-
-Instruction: {instruction}
-
-Steps:
-1."""
-    # invoke LLM
-    response = llm.invoke(messages + [SystemMessage(content=prompt)])
+    # (last message is the user's instruction)
+    response = llm.invoke(plan_prompt.build(history=messages))
     # parse response into list of step strings
     content = response.content.strip()
     # remove prefix “1.” if present, split by newline and numbering
@@ -45,8 +53,9 @@ Steps:
             # fallback: whole line
             steps.append(line.strip())
     # update state
+    # Only the new message is returned, add_messages appends it to the stored list
     new = {
-        "messages": state["messages"] + [response],
+        "messages": [response],
         "steps": steps,
         "current_step": 0,
         "results": {}
@@ -81,21 +90,12 @@ def execute_step(state: AgentState) -> AgentState:
             result = f"Error executing command '{cmd}': {e}"
     else:
         # default: ask the LLM to do this step (explain / answer / compute)
-        prompt = f"""
-You are an assistant. Execute the following step (or respond) in context.
-
-Step: {step}
-
-Conversation history:
-{''.join(m.content for m in messages)}
-
-Answer / result:
-"""
-        response = llm.invoke(messages + [SystemMessage(content=prompt)])
+        # history is sent as messages once, instead of being copied into a fresh system prompt
+        response = llm.invoke(execute_prompt.build(history=messages, delta=[HumanMessage(content=f"Step: {step}")]))
         result = response.content
 
     # update state: add result, advance idx
-    new_messages = state["messages"] + [AIMessage(content=result)]
+    new_messages = [AIMessage(content=result)]
     new_results = dict(state["results"])
     new_results[idx] = result
     return {
@@ -128,19 +128,28 @@ if __name__ == "__main__":
     graph.add_edge("executor", "executor")  # loop: executor to itself until done
     graph.add_edge("executor", END)
 
-    # compile with memory / checkpointing
-    compiled = graph.compile(checkpointer=MemorySaver())
-
-    # receive user input
-    user_input = input("Enter your instruction: ")
-    init_state: AgentState = {
-        "messages": [HumanMessage(content=user_input)],
-        "steps": [],
-        "current_step": 0,
-        "results": {}
-    }
+    # compile with durable checkpointing, only the latest few checkpoints per thread are kept
+    checkpointer = open_checkpointer("graph_assistant_checkpoints.sqlite")
+    compiled = graph.compile(checkpointer=checkpointer)
+    # every instruction gets its own thread, only an interrupted one is picked up again
+    config, resuming = open_thread(compiled, checkpointer)
 
-    final = compiled.invoke(init_state)
+    if resuming:
+        # previous run stopped halfway, continue from its last finished step
+        print("Resuming unfinished instruction")
+        final = compiled.invoke(None, config)
+    else:
+        # receive user input
+        user_input = input("Enter your instruction: ")
+        init_state: AgentState = {
+            "messages": [HumanMessage(content=user_input)],
+            "steps": [],
+            "current_step": 0,
+            "results": {}
+        }
+
+        final = compiled.invoke(init_state, config)
+    finish_thread(checkpointer, config)
     print("Final results per step:")
     for idx, res in final["results"].items():
         print(f"Step {idx+1}: {res}")
@@ -2,6 +2,8 @@ from langchain_ollama import ChatOllama
 from langgraph.graph.state import CompiledStateGraph
 from langchain_core.messages import HumanMessage
 
+from agent_state import AgentContext
+
 def stream_graph_updates(graph : CompiledStateGraph, config :  dict[str, dict[str, str]], user_input: str):
 	for event in graph.stream({"messages": [{"role": "user", "content": user_input}]}, config):
 		for value in event.values():
@@ -21,8 +23,20 @@ def invoke_graph_with_messages(graph : CompiledStateGraph, config :  dict[str, d
 	for m in messages["messages"]:
 		m.pretty_print()
 
+def resume_graph(graph : CompiledStateGraph, config :  dict[str, dict[str, str]], llm: ChatOllama):
+	"""Continues a run which was interrupted, from its latest checkpoint"""
+	for event in graph.stream(None, config, context=AgentContext(llm=llm)):
+		for value in event.values():
+			# Nodes return messages only when they add one
+			if value and value.get("messages"):
+				print("Assistant:", value["messages"][-1].content)
+
 def stream_graph_updates_with_messages(graph : CompiledStateGraph, config :  dict[str, dict[str, str]], messages: list, llm: ChatOllama):
-	for event in graph.stream({"messages": messages, "steps": "", "current_step":0, "llm": llm}, config):
+	# Model goes in as run context, so it is never part of state or checkpoints
+	for event in graph.stream({"messages": messages, "steps": "", "current_step":0}, config, context=AgentContext(llm=llm)):
 		for value in event.values():
-			print("Assistant:", value["messages"][-1].content)
-			print("Steps:", value["steps"])
\ No newline at end of file
+			# Nodes return messages only when they add one
+			if value and value.get("messages"):
+				print("Assistant:", value["messages"][-1].content)
+			if value and value.get("steps"):
+				print("Steps:", value["steps"])
\ No newline at end of file
@@ -1,12 +1,14 @@
 from langchain_core.messages import HumanMessage, SystemMessage
 from langgraph.graph import StateGraph, START, END
-from langgraph.checkpoint.memory import MemorySaver
+from langgraph.runtime import get_runtime
 from langchain_ollama.chat_models import ChatOllama
 
-from agent_state import AgentState, get_new_state
+from agent_state import AgentState, AgentContext, get_new_state
 from system_nodes import listen_to_query
 from node_decider import has_user_asked_to_quit
-from invokers import stream_graph_updates_with_messages
+from invokers import stream_graph_updates_with_messages, resume_graph
+from prompt_builder import PromptBuilder
+from checkpointing import open_checkpointer, open_thread, finish_thread
 
 llm = ChatOllama(model="openchat:latest")
 
@@ -27,9 +29,9 @@ def chatbot(state: AgentState):
 	"""Provide Appropriate Response to messages"""
 	return get_new_state(state)
 
-def split_instructions_in_steps(state: AgentState):
-	"""Split Instructions In steps"""
-	system_message_for_splitting_in_steps = f"""
+# Static prefix, kept byte identical between calls so Ollama can reuse its KV cache.
+# Instruction is sent as a separate message after it
+SPLIT_STEPS_PROMPT = """
 	You are a decomposition assistant. You receive query from user,
 	the query can be a simple question, or an instruction of performing some actions.
 	The actions can include
@@ -57,17 +59,22 @@ def split_instructions_in_steps(state: AgentState):
 				2. Open Visual Studio Code
 				3. Search on Google for security authentication with dotnet related articles
 
-	Instruction: {state["messages"][-1].content}
-	
-	Steps:
-	1.
+	Reply with the numbered steps for the instruction given by user.
 	"""
-	response = llm.invoke(system_message_for_splitting_in_steps)
+
+split_steps_prompt = PromptBuilder(SystemMessage(content=SPLIT_STEPS_PROMPT))
+
+def split_instructions_in_steps(state: AgentState):
+	"""Split Instructions In steps"""
+	instruction = state["messages"][-1].content
+	llm = get_runtime(AgentContext).context.llm
+	response = llm.invoke(split_steps_prompt.build(delta=[HumanMessage(content=f"Instruction: {instruction}")]))
 	return get_new_state(state, steps=response.content)
 
-memory = MemorySaver()
+# Checkpoints go to SQLite, only the latest few per thread are kept
+memory = open_checkpointer("langgraph_try_checkpoints.sqlite")
 
-graph_builder = StateGraph(AgentState)
+graph_builder = StateGraph(AgentState, context_schema=AgentContext)
 
 graph_builder.add_node("listening", listen_to_query)
 graph_builder.add_node("split_instructions_in_steps", split_instructions_in_steps)
@@ -81,8 +88,13 @@ graph_builder.add_edge("split_instructions_in_steps", "listening")
 
 graph = graph_builder.compile(checkpointer=memory)
 
-# we assign a thread id to store the conversation
-config = {"configurable": {"thread_id": "1"}}
+# Interrupted conversation is resumed, otherwise every start gets a fresh thread
+config, resuming = open_thread(graph, memory)
 
 messages = [SystemMessage(content="""You are a helpful query assistant. Provide appropriate response to user queries""")]
-stream_graph_updates_with_messages(graph, config, messages, llm)
\ No newline at end of file
+if resuming:
+	print("Resuming previous conversation")
+	resume_graph(graph, config, llm)
+else:
+	stream_graph_updates_with_messages(graph, config, messages, llm)
+finish_thread(memory, config)
@@ -0,0 +1,193 @@
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+import numpy as np
+
+from Assistant.memory_retention import to_epoch
+
+class MemoryIndex:
+	"""
+	Fixed size vector index over past conversation turns.
+
+	Unit length float32 embeddings live in a memory-mapped .npy file, so the
+	index is not read into RAM at start-up and new rows are written in place.
+	Slots are used as a ring, once capacity is reached the oldest turn is
+	overwritten. Snippet text of every slot is kept in an append-only JSON
+	lines file, the newest line for a slot wins, and it is rewritten oldest
+	first when it grows past twice the capacity, so replaying it always ends
+	at the slot written last. Every line carries a checksum of its vector,
+	a slot whose vector was written but whose line wasn't (crash in between)
+	is dropped on load. Turns which expired from memory are forgotten by
+	timestamp, their slots stay until overwritten but are never returned.
+	Search is a single matrix-vector product followed by a partial sort,
+	cost depends on capacity only.
+	"""
+	def __init__(self, directory: str, embed: Callable[[str], List[float]], capacity: int = 4096,
+	             name: str = "memory_index", max_snippet_chars: int = 400):
+		self.embed = embed
+		self.capacity = capacity
+		self.max_snippet_chars = max_snippet_chars
+		self.vectors_path = os.path.join(directory, name + ".npy")
+		self.meta_path = os.path.join(directory, name + ".jsonl")
+
+		self.vectors : Optional[np.memmap] = None
+		self.slots : Dict[int, dict] = {}
+		# Rows holding a vector which matches its snippet
+		self.valid = np.zeros(capacity, dtype=bool)
+		# Epoch seconds of every slot's turn
+		self.times = np.full(capacity, -np.inf)
+		self.next_slot = 0
+		self.meta_lines = 0
+		self.lock = threading.Lock()
+		self.load()
+
+	def __len__(self) -> int:
+		return len(self.slots)
+
+	def load(self):
+		if not os.path.exists(self.vectors_path) or not os.path.exists(self.meta_path):
+			return
+		try:
+			vectors = np.load(self.vectors_path, mmap_mode="r+")
+		except Exception as e:
+			print("Memory index load error:", e)
+			return
+		if vectors.ndim != 2 or vectors.shape[0] != self.capacity:
+			# Capacity changed, old index gets rebuilt from new turns
+			return
+		self.vectors = vectors
+
+		with open(self.meta_path, "r", encoding="utf-8") as f:
+			for line in f:
+				try:
+					entry = json.loads(line)
+				except json.JSONDecodeError:
+					continue
+				self.meta_lines += 1
+				self.slots[entry["slot"]] = entry
+				self.next_slot = (entry["slot"] + 1) % self.capacity
+
+		for slot, entry in list(self.slots.items()):
+			check = entry.get("check")
+			if check is None or abs(self.checksum(self.vectors[slot]) - check) > 1e-3:
+				# Vector was overwritten by a turn whose snippet never made it to disk
+				del self.slots[slot]
+			else:
+				self.valid[slot] = True
+				self.times[slot] = self.time_of(entry)
+
+	def create(self, dim: int):
+		"""
+		Allocates a fresh index for embeddings of given size
+		:param dim:
+		:return:
+		"""
+		self.vectors = np.lib.format.open_memmap(self.vectors_path, mode="w+", dtype=np.float32, shape=(self.capacity, dim))
+		self.slots = {}
+		self.valid[:] = False
+		self.times[:] = -np.inf
+		self.next_slot = 0
+		self.meta_lines = 0
+		open(self.meta_path, "w", encoding="utf-8").close()
+
+	@staticmethod
+	def checksum(vector: np.ndarray) -> float:
+		return round(float(np.sum(vector, dtype=np.float64)), 4)
+
+	@staticmethod
+	def time_of(entry: dict) -> float:
+		# Turns added without a timestamp count as added now, time based expiry skips them
+		if entry.get("timestamp") is None:
+			return time.time()
+		return to_epoch(entry["timestamp"])
+
+	def vector_for(self, text: str) -> np.ndarray:
+		vector = np.asarray(self.embed(text), dtype=np.float32)
+		norm = np.linalg.norm(vector)
+		return vector / norm if norm else vector
+
+	@staticmethod
+	def snippet_for(user_text: str, assistant_text: str) -> str:
+		return f"User: {user_text}\nAssistant: {assistant_text}"
+
+	def add(self, user_text: str, assistant_text: str, timestamp: str = None):
+		"""
+		Embeds a finished turn and stores it in the next slot
+		:param user_text:
+		:param assistant_text:
+		:param timestamp:
+		:return:
+		"""
+		snippet = self.snippet_for(user_text or "", assistant_text or "")[:self.max_snippet_chars]
+		vector = self.vector_for(snippet)
+
+		with self.lock:
+			if self.vectors is None or self.vectors.shape[1] != len(vector):
+				self.create(len(vector))
+			slot = self.next_slot
+			# Vector is flushed before its line, a crash in between is caught by the checksum on load
+			self.vectors[slot] = vector
+			self.vectors.flush()
+
+			entry = {"slot": slot, "text": snippet, "timestamp": timestamp, "check": self.checksum(self.vectors[slot])}
+			self.slots[slot] = entry
+			self.valid[slot] = True
+			self.times[slot] = self.time_of(entry)
+			self.next_slot = (slot + 1) % self.capacity
+			with open(self.meta_path, "a", encoding="utf-8") as f:
+				f.write(json.dumps(entry) + "\n")
+			self.meta_lines += 1
+			if self.meta_lines > 2 * self.capacity:
+				self.compact()
+
+	def compact(self):
+		temp_path = self.meta_path + ".tmp"
+		with open(temp_path, "w", encoding="utf-8") as f:
+			# Oldest first, starting at next slot to overwrite, so load() ends up at the same next_slot
+			for offset in range(self.capacity):
+				entry = self.slots.get((self.next_slot + offset) % self.capacity)
+				if entry is not None:
+					f.write(json.dumps(entry) + "\n")
+			f.flush()
+			os.fsync(f.fileno())
+		os.replace(temp_path, self.meta_path)
+		self.meta_lines = len(self.slots)
+
+	def forget_before(self, moment: float) -> int:
+		"""
+		Stops returning turns older than moment, used once memory store expired them
+		:param moment: epoch seconds
+		:return: number of forgotten turns
+		"""
+		with self.lock:
+			expired = np.flatnonzero(self.valid & (self.times < moment))
+			for slot in expired:
+				self.slots.pop(int(slot), None)
+			self.valid[expired] = False
+		return len(expired)
+
+	def search(self, query: str, k: int = 3, min_score: float = 0.5, vector: np.ndarray = None) -> List[str]:
+		"""
+		Snippets of past turns most similar to query
+		:param query:
+		:param k: maximum number of snippets
+		:param min_score: cosine similarity a snippet needs to be returned
+		:param vector: unit length embedding of query when caller already has one
+		:return: snippets, most similar first
+		"""
+		if self.vectors is None or not self.slots:
+			return []
+		if vector is None:
+			vector = self.vector_for(query)
+
+		with self.lock:
+			if self.vectors.shape[1] != len(vector):
+				return []
+			scores = self.vectors @ vector
+			scores[~self.valid] = -np.inf
+			k = min(k, len(self.slots))
+			top = np.argpartition(-scores, k - 1)[:k]
+			top = top[np.argsort(-scores[top])]
+			return [self.slots[int(slot)]["text"] for slot in top if scores[slot] >= min_score]
@@ -0,0 +1,89 @@
+import bisect
+import datetime
+import time
+from typing import Dict, List
+
+def to_epoch(timestamp: str) -> float:
+	"""
+	:param timestamp: iso timestamp as written by save_memory
+	:return: seconds since epoch, unparsable timestamps count as oldest possible
+	"""
+	try:
+		return datetime.datetime.fromisoformat(timestamp).timestamp()
+	except (TypeError, ValueError):
+		return float("-inf")
+
+class TimeOrderedRecords:
+	"""
+	History records sorted by timestamp, with a parallel list of epoch times.
+
+	Timestamps are parsed once, when a record comes in. Records normally
+	arrive in time order and are simply appended, an older one is inserted
+	at its sorted position. Oldest records always sit at the front, so
+	expiry is a bisect followed by one slice delete.
+	"""
+	def __init__(self):
+		self.records : List[Dict] = []
+		self.times : List[float] = []
+
+	def __len__(self) -> int:
+		return len(self.records)
+
+	def add(self, record: Dict):
+		moment = to_epoch(record.get("timestamp"))
+		if not self.times or moment >= self.times[-1]:
+			self.records.append(record)
+			self.times.append(moment)
+			return
+		position = bisect.bisect_right(self.times, moment)
+		self.records.insert(position, record)
+		self.times.insert(position, moment)
+
+	def count_before(self, moment: float, inclusive: bool = False) -> int:
+		if inclusive:
+			return bisect.bisect_right(self.times, moment)
+		return bisect.bisect_left(self.times, moment)
+
+	def drop_oldest(self, count: int) -> int:
+		count = min(count, len(self.records))
+		if count > 0:
+			del self.records[:count]
+			del self.times[:count]
+		return count
+
+class RetentionPolicy:
+	"""
+	Decides how many of the oldest records have expired.
+
+	A record is kept while its age in whole days is at most window_days, like
+	timedelta.days <= window_days did before, so it goes once it is
+	window_days + 1 days old. When more than max_records remain, the oldest
+	ones over the cap go too. Checks are lazy: expiry runs
+	at most once every check_interval seconds, unless the cap is exceeded.
+	"""
+	def __init__(self, window_days: float = 30, max_records: int = 10000, check_interval: float = 3600):
+		self.window_days = window_days
+		self.max_records = max_records
+		self.check_interval = check_interval
+		self.last_check = float("-inf")
+
+	def due(self, records: TimeOrderedRecords, now: float = None) -> bool:
+		now = time.time() if now is None else now
+		if self.max_records is not None and len(records) > self.max_records:
+			return True
+		return now - self.last_check >= self.check_interval
+
+	def expired_count(self, records: TimeOrderedRecords, now: float = None) -> int:
+		"""
+		:param records:
+		:param now: epoch seconds, defaults to current time
+		:return: number of oldest records to drop
+		"""
+		now = time.time() if now is None else now
+		self.last_check = now
+		count = 0
+		if self.window_days is not None:
+			count = records.count_before(now - (self.window_days + 1) * 86400, inclusive=True)
+		if self.max_records is not None:
+			count = max(count, len(records) - self.max_records)
+		return count
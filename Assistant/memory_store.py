@@ -0,0 +1,168 @@
+import datetime
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+from Assistant.memory_retention import TimeOrderedRecords, RetentionPolicy
+
+class MemoryStore:
+	"""
+	Conversation memory kept in an append-only JSON lines log.
+
+	File is read once per process, afterwards every change is one appended
+	line: {"op": "add", "record": {...}} for a new history record and
+	{"op": "drop_oldest", "count": n} for a retention cut. A
+	partially written last line (crash during append) is ignored on load.
+	When the log holds many more lines than live records it is compacted by
+	writing a snapshot to a temporary file and atomically replacing the log,
+	so a crash leaves either the old or the new file, never a mix.
+	"""
+	def __init__(self, path: str, legacy_path: str = None, retention: RetentionPolicy = None,
+	             compact_ratio: float = 2.0, compact_min_lines: int = 256, fsync: bool = True):
+		self.path = path
+		self.legacy_path = legacy_path
+		self.retention = retention or RetentionPolicy()
+		self.compact_ratio = compact_ratio
+		self.compact_min_lines = compact_min_lines
+		self.fsync = fsync
+
+		self.records = TimeOrderedRecords()
+		self.log_lines = 0
+		self.loaded_at : Optional[str] = None
+		self.lock = threading.Lock()
+
+	@property
+	def loaded(self) -> bool:
+		return self.loaded_at is not None
+
+	def load(self):
+		"""
+		Replays the log into memory, only the first call reads the file
+		:return:
+		"""
+		with self.lock:
+			if self.loaded:
+				return
+			if os.path.exists(self.path):
+				self.replay()
+			elif self.legacy_path is not None and os.path.exists(self.legacy_path):
+				self.migrate_legacy()
+			self.loaded_at = datetime.datetime.now().isoformat()
+
+	def replay(self):
+		torn = False
+		with open(self.path, "r", encoding="utf-8") as f:
+			for line in f:
+				line = line.strip()
+				if not line:
+					continue
+				try:
+					entry = json.loads(line)
+				except json.JSONDecodeError:
+					# Torn write from a crash, everything before it is intact
+					print("Memory log: skipping unreadable line")
+					torn = True
+					continue
+				self.log_lines += 1
+				self.apply(entry)
+		if torn:
+			# Rewrite cleanly, appending after a torn line would corrupt next record too
+			self.write_snapshot()
+
+	def migrate_legacy(self):
+		"""
+		Imports history of the old single JSON file, then writes it out as a fresh log
+		:return:
+		"""
+		try:
+			with open(self.legacy_path, "r", encoding="utf-8") as f:
+				legacy = json.load(f)
+			for record in legacy.get("history", []):
+				self.records.add(record)
+		except Exception as e:
+			print("Memory migration error:", e)
+			return
+		self.write_snapshot()
+
+	def apply(self, entry: Dict):
+		if entry.get("op") == "add":
+			self.records.add(entry["record"])
+		elif entry.get("op") == "drop_oldest":
+			self.records.drop_oldest(entry["count"])
+
+	def append_line(self, entry: Dict):
+		with open(self.path, "a", encoding="utf-8") as f:
+			f.write(json.dumps(entry, default=str, separators=(",", ":")) + "\n")
+			f.flush()
+			if self.fsync:
+				os.fsync(f.fileno())
+		self.log_lines += 1
+
+	def add(self, record: Dict):
+		"""
+		Appends a history record, costs one short write whatever the history size
+		:param record: dict with at least an iso "timestamp"
+		:return:
+		"""
+		self.load()
+		with self.lock:
+			self.records.add(record)
+			self.append_line({"op": "add", "record": record})
+			self.compact_if_needed()
+
+	def expire(self, now: float = None, force: bool = False) -> int:
+		"""
+		Applies retention policy, cheap no-op unless a check is due
+		:param now: epoch seconds, defaults to current time
+		:param force: check even if policy says it isn't due yet
+		:return: number of removed records
+		"""
+		self.load()
+		with self.lock:
+			if not force and not self.retention.due(self.records, now):
+				return 0
+			removed = self.records.drop_oldest(self.retention.expired_count(self.records, now))
+			if removed:
+				self.append_line({"op": "drop_oldest", "count": removed})
+				self.compact_if_needed()
+		return removed
+
+	def oldest_time(self) -> Optional[float]:
+		"""
+		:return: epoch seconds of oldest live record, None when there are none
+		"""
+		self.load()
+		with self.lock:
+			return self.records.times[0] if self.records.times else None
+
+	def history(self) -> List[Dict]:
+		"""
+		Live history records, oldest first. Callers must not modify the list
+		:return:
+		"""
+		self.load()
+		return self.records.records
+
+	def compact_if_needed(self):
+		if self.log_lines >= self.compact_min_lines and self.log_lines > self.compact_ratio * len(self.records):
+			self.write_snapshot()
+
+	def compact(self):
+		self.load()
+		with self.lock:
+			self.write_snapshot()
+
+	def write_snapshot(self):
+		"""
+		Rewrites log as one "add" line per live record, crash safe through atomic replace
+		:return:
+		"""
+		temp_path = self.path + ".tmp"
+		with open(temp_path, "w", encoding="utf-8") as f:
+			for record in self.records.records:
+				f.write(json.dumps({"op": "add", "record": record}, default=str, separators=(",", ":")) + "\n")
+			f.flush()
+			os.fsync(f.fileno())
+		os.replace(temp_path, self.path)
+		self.log_lines = len(self.records)
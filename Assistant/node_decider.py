@@ -1,16 +1,23 @@
-from agent_state import AgentState
+from langchain_core.messages import HumanMessage, SystemMessage
+from langgraph.runtime import get_runtime
 
-def has_user_asked_to_quit(state: AgentState):
-	"""Decided if user has asked to end conversation or not"""
-	system_message_for_quit = f"""
+from agent_state import AgentState, AgentContext
+from prompt_builder import PromptBuilder
+
+QUIT_DETECTION_PROMPT = """
 	You are helpful assistant capable of detecting whether
 	user is asking to end the conversation or not. Given the following,
 	conversation, determine if user has shown intent to quit conversation.
 	Keep your response limited to Yes/No.
-
-	User Query : {state["messages"][-1].content}
 	"""
-	response = state["llm"].invoke(system_message_for_quit)
+
+quit_detection_prompt = PromptBuilder(SystemMessage(content=QUIT_DETECTION_PROMPT))
+
+def has_user_asked_to_quit(state: AgentState):
+	"""Decided if user has asked to end conversation or not"""
+	user_query = HumanMessage(content=f"User Query : {state['messages'][-1].content}")
+	llm = get_runtime(AgentContext).context.llm
+	response = llm.invoke(quit_detection_prompt.build(delta=[user_query]))
 	print("Quitting : ", response.content)
 	if "Yes" in response.content:
 		return "quit_conversation"
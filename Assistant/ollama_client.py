@@ -0,0 +1,178 @@
+import asyncio
+import json
+import os
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Union
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+# How long Ollama keeps model weights resident after a request
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+# Ollama answering with these didn't run the model, so resending costs nothing.
+# Read timeouts are never retried, the model may still be generating the first answer
+RETRY_STATUSES = (502, 503, 504)
+
+def build_payload(model: str, keep_alive: str, stream: bool, options: Optional[dict], format: Union[str, dict, None], **fields) -> Dict[str, Any]:
+	payload = {"model": model, "stream": stream, "keep_alive": keep_alive, **fields}
+	if options:
+		payload["options"] = options
+	if format:
+		payload["format"] = format
+	return payload
+
+class OllamaClient:
+	"""
+	Blocking Ollama client sharing one pooled keep-alive requests.Session.
+	Connection errors and 502/503/504 responses are retried with exponential backoff.
+	"""
+	def __init__(self, base_url: str = OLLAMA_BASE_URL, model: str = "openchat:latest", keep_alive: str = OLLAMA_KEEP_ALIVE,
+	             connect_timeout: float = 5, read_timeout: float = 120, retries: int = 3, backoff: float = 0.5, pool_size: int = 8):
+		self.base_url = base_url.rstrip("/")
+		self.model = model
+		self.keep_alive = keep_alive
+		self.timeout = (connect_timeout, read_timeout)
+
+		retry = Retry(
+				total=retries,
+				read=0,
+				backoff_factor=backoff,
+				status_forcelist=RETRY_STATUSES,
+				allowed_methods=["GET", "POST"],
+				raise_on_status=False
+		)
+		adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+		self.session = requests.Session()
+		self.session.mount("http://", adapter)
+		self.session.mount("https://", adapter)
+
+	def post(self, path: str, payload: dict, stream: bool = False) -> requests.Response:
+		response = self.session.post(f"{self.base_url}{path}", json=payload, stream=stream, timeout=self.timeout)
+		response.raise_for_status()
+		return response
+
+	@staticmethod
+	def iter_chunks(response: requests.Response) -> Iterator[dict]:
+		with response:
+			for line in response.iter_lines():
+				if not line:
+					continue
+				chunk = json.loads(line)
+				yield chunk
+				if chunk.get("done"):
+					break
+
+	def generate(self, prompt: str, system: str = "", model: str = None, stream: bool = False,
+	             options: dict = None, format: Union[str, dict] = None) -> Union[str, Iterator[str]]:
+		"""
+		Calls /api/generate
+		:return: full response text, or iterator over text pieces when stream is True
+		"""
+		payload = build_payload(model or self.model, self.keep_alive, stream, options, format, prompt=prompt, system=system)
+		response = self.post("/api/generate", payload, stream=stream)
+		if stream:
+			return (chunk.get("response", "") for chunk in self.iter_chunks(response))
+		return response.json()["response"]
+
+	def chat(self, messages: List[dict], model: str = None, stream: bool = False,
+	         options: dict = None, format: Union[str, dict] = None) -> Union[dict, Iterator[dict]]:
+		"""
+		Calls /api/chat
+		:param messages: list of {"role", "content"} dicts
+		:return: final response json (with prompt_eval_count etc.), or iterator over response chunks
+		"""
+		payload = build_payload(model or self.model, self.keep_alive, stream, options, format, messages=messages)
+		response = self.post("/api/chat", payload, stream=stream)
+		if stream:
+			return self.iter_chunks(response)
+		return response.json()
+
+	def embed(self, text: str, model: str = "nomic-embed-text") -> List[float]:
+		payload = {"model": model, "prompt": text, "keep_alive": self.keep_alive}
+		return self.post("/api/embeddings", payload).json()["embedding"]
+
+	def warm_up(self, model: str = None):
+		"""
+		Loads model weights without generating anything
+		"""
+		self.post("/api/generate", {"model": model or self.model, "keep_alive": self.keep_alive})
+
+	def close(self):
+		self.session.close()
+
+class AsyncOllamaClient:
+	"""
+	asyncio variant of OllamaClient built on a pooled httpx.AsyncClient
+	"""
+	def __init__(self, base_url: str = OLLAMA_BASE_URL, model: str = "openchat:latest", keep_alive: str = OLLAMA_KEEP_ALIVE,
+	             connect_timeout: float = 5, read_timeout: float = 120, retries: int = 3, backoff: float = 0.5, pool_size: int = 8):
+		self.model = model
+		self.keep_alive = keep_alive
+		self.retries = retries
+		self.backoff = backoff
+		self.client = httpx.AsyncClient(
+				base_url=base_url.rstrip("/"),
+				timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+				limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+		)
+
+	async def post(self, path: str, payload: dict) -> httpx.Response:
+		for attempt in range(self.retries + 1):
+			try:
+				response = await self.client.post(path, json=payload)
+				if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+					response.raise_for_status()
+					return response
+			except httpx.ConnectError:
+				if attempt == self.retries:
+					raise
+			await asyncio.sleep(self.backoff * (2 ** attempt))
+
+	async def stream(self, path: str, payload: dict) -> AsyncIterator[dict]:
+		async with self.client.stream("POST", path, json=payload) as response:
+			response.raise_for_status()
+			async for line in response.aiter_lines():
+				if not line:
+					continue
+				chunk = json.loads(line)
+				yield chunk
+				if chunk.get("done"):
+					break
+
+	async def generate(self, prompt: str, system: str = "", model: str = None,
+	                   options: dict = None, format: Union[str, dict] = None) -> str:
+		payload = build_payload(model or self.model, self.keep_alive, False, options, format, prompt=prompt, system=system)
+		return (await self.post("/api/generate", payload)).json()["response"]
+
+	async def generate_stream(self, prompt: str, system: str = "", model: str = None,
+	                          options: dict = None, format: Union[str, dict] = None) -> AsyncIterator[str]:
+		payload = build_payload(model or self.model, self.keep_alive, True, options, format, prompt=prompt, system=system)
+		async for chunk in self.stream("/api/generate", payload):
+			yield chunk.get("response", "")
+
+	async def chat(self, messages: List[dict], model: str = None,
+	               options: dict = None, format: Union[str, dict] = None) -> dict:
+		payload = build_payload(model or self.model, self.keep_alive, False, options, format, messages=messages)
+		return (await self.post("/api/chat", payload)).json()
+
+	async def embed(self, text: str, model: str = "nomic-embed-text") -> List[float]:
+		payload = {"model": model, "prompt": text, "keep_alive": self.keep_alive}
+		return (await self.post("/api/embeddings", payload)).json()["embedding"]
+
+	async def close(self):
+		await self.client.aclose()
+
+_default_client : Optional[OllamaClient] = None
+
+def get_client() -> OllamaClient:
+	"""
+	Process wide client, so every call reuses same connection pool
+	:return:
+	"""
+	global _default_client
+	if _default_client is None:
+		_default_client = OllamaClient()
+	return _default_client
@@ -0,0 +1,21 @@
+from typing import Any, List, Sequence
+
+class PromptBuilder:
+	"""
+	Assembles prompts as a static prefix followed by the changing parts.
+
+	The prefix messages are created once and reused as-is, so every request
+	starts with byte identical tokens and Ollama (llama.cpp) can reuse the KV
+	cache for them. Conversation history is only ever appended to, and the
+	new input goes last, so only the delta needs prompt evaluation.
+	"""
+	def __init__(self, *prefix: Any):
+		self.prefix = tuple(prefix)
+
+	def build(self, history: Sequence[Any] = (), delta: Sequence[Any] = ()) -> List[Any]:
+		"""
+		:param history: earlier messages, in order, never rewritten
+		:param delta: new messages for this call
+		:return: prefix + history + delta
+		"""
+		return [*self.prefix, *history, *delta]
@@ -0,0 +1,252 @@
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Callable, List, Optional
+import numpy as np
+
+# Questions whose answer changes over time are never cached
+TIME_SENSITIVE_PATTERN = re.compile(
+		r"\b(time|date|day|today|tonight|tomorrow|yesterday|now|current|currently|latest|recent|news|"
+		r"weather|forecast|temperature|score|price|stock|this (week|month|year)|remind|schedule)\b")
+
+CONTRACTIONS = {
+		"what's": "what is", "whats": "what is", "who's": "who is", "where's": "where is",
+		"how's": "how is", "it's": "it is", "that's": "that is", "i'm": "i am",
+}
+
+MAX_PENDING_EMBEDDINGS = 64
+
+# Numbers and names, embeddings barely tell "2*3" from "2*4" or "Paris" from "Prague"
+ANCHOR_PATTERN = re.compile(r"\d+(?:\.\d+)?|(?<![.!?]\s)(?<!^)\b[A-Z][\w'-]*")
+
+class ResponseCache:
+	"""
+	Local cache of LLM answers keyed on normalized prompt.
+
+	Exact lookups use the normalized prompt, optional embedding lookup finds
+	paraphrased questions by cosine similarity over a float16 matrix, a
+	semantic hit also needs the same numbers and names as the cached prompt. Entries
+	expire after ttl seconds, least recently used ones are evicted when cache is
+	full, and everything is persisted next to given path.
+	"""
+	def __init__(self, path: str, max_entries: int = 512, ttl: float = 7 * 24 * 3600,
+	             embed: Callable[[str], List[float]] = None, similarity_threshold: float = 0.92):
+		self.path = path
+		self.index_path = os.path.splitext(path)[0] + ".npy"
+		self.max_entries = max_entries
+		self.ttl = ttl
+		self.embed = embed
+		self.similarity_threshold = similarity_threshold
+
+		# normalized prompt -> {"response", "created", "embedding" (row in matrix or None)}
+		self.entries : "OrderedDict[str, dict]" = OrderedDict()
+		self.keys : List[str] = []
+		self.matrix : Optional[np.ndarray] = None
+		# Embeddings of recent misses, taken by put() so a prompt isn't embedded twice
+		self.pending_embeddings : "OrderedDict[str, np.ndarray]" = OrderedDict()
+		self.lock = threading.Lock()
+		# Held for a whole save, concurrent put() calls write one after another
+		self.save_lock = threading.Lock()
+		self.stats = {"hits": 0, "semantic_hits": 0, "misses": 0, "bypassed": 0}
+		self.load()
+
+	@staticmethod
+	def normalize(prompt: str) -> str:
+		text = prompt.lower().strip()
+		for short, full in CONTRACTIONS.items():
+			text = re.sub(rf"\b{re.escape(short)}", full, text)
+		text = re.sub(r"[^\w\s*+/-]", " ", text)
+		return re.sub(r"\s+", " ", text).strip()
+
+	@staticmethod
+	def anchors(prompt: str) -> List[str]:
+		"""
+		Numbers and capitalized words past the start of a sentence, in order
+		:param prompt:
+		:return:
+		"""
+		return [anchor.lower() for anchor in ANCHOR_PATTERN.findall(prompt.strip())]
+
+	@staticmethod
+	def is_time_sensitive(prompt: str) -> bool:
+		return bool(TIME_SENSITIVE_PATTERN.search(prompt.lower()))
+
+	def expired(self, entry: dict) -> bool:
+		return time.time() - entry["created"] > self.ttl
+
+	def get(self, prompt: str) -> Optional[str]:
+		"""
+		:param prompt:
+		:return: cached response, or None on a miss
+		"""
+		if self.is_time_sensitive(prompt):
+			self.stats["bypassed"] += 1
+			return None
+		key = self.normalize(prompt)
+
+		with self.lock:
+			entry = self.entries.get(key)
+			if entry is not None and not self.expired(entry):
+				self.entries.move_to_end(key)
+				self.stats["hits"] += 1
+				return entry["response"]
+
+		semantic = self.semantic_lookup(key, self.anchors(prompt))
+		if semantic is not None:
+			self.stats["semantic_hits"] += 1
+			return semantic
+
+		self.stats["misses"] += 1
+		return None
+
+	def semantic_lookup(self, key: str, anchors: List[str]) -> Optional[str]:
+		if self.embed is None:
+			return None
+		try:
+			vector = np.asarray(self.embed(key), dtype=np.float32)
+		except Exception as e:
+			print("Cache embedding error:", e)
+			return None
+		vector /= np.linalg.norm(vector) or 1.0
+
+		with self.lock:
+			# Kept for put(), so a miss doesn't embed same prompt twice
+			self.pending_embeddings[key] = vector
+			self.pending_embeddings.move_to_end(key)
+			# Misses which never get stored (errors, personalised answers) must not pile up
+			while len(self.pending_embeddings) > MAX_PENDING_EMBEDDINGS:
+				self.pending_embeddings.popitem(last=False)
+			matrix = self.embedding_matrix()
+			if matrix is None or matrix.shape[1] != vector.shape[0]:
+				return None
+			similarities = matrix.astype(np.float32) @ vector
+			best = int(np.argmax(similarities))
+			if similarities[best] < self.similarity_threshold:
+				return None
+			match = self.keys[best]
+			entry = self.entries[match]
+			if self.expired(entry) or entry.get("anchors") != anchors:
+				return None
+			self.entries.move_to_end(match)
+			return entry["response"]
+
+	def embedding_for(self, prompt: str) -> Optional[np.ndarray]:
+		"""
+		Unit length embedding computed by last get() of this prompt, lets callers reuse it
+		:param prompt:
+		:return: None when prompt wasn't embedded
+		"""
+		with self.lock:
+			return self.pending_embeddings.get(self.normalize(prompt))
+
+	def embedding_matrix(self) -> Optional[np.ndarray]:
+		"""
+		Rebuilds float16 embedding matrix when entries changed, called with lock held
+		:return:
+		"""
+		if self.matrix is None:
+			keys = [key for key, entry in self.entries.items() if entry.get("embedding") is not None]
+			if keys:
+				self.keys = keys
+				self.matrix = np.stack([self.entries[key]["embedding"] for key in keys]).astype(np.float16)
+		return self.matrix
+
+	def put(self, prompt: str, response: str):
+		if self.is_time_sensitive(prompt) or not response:
+			return
+		key = self.normalize(prompt)
+		with self.lock:
+			self.entries[key] = {
+					"response": response,
+					"created": time.time(),
+					"anchors": self.anchors(prompt),
+					"embedding": self.pending_embeddings.pop(key, None)
+			}
+			self.entries.move_to_end(key)
+			self.evict()
+			self.matrix = None
+		self.save()
+
+	def evict(self):
+		now = time.time()
+		for key in [key for key, entry in self.entries.items() if now - entry["created"] > self.ttl]:
+			del self.entries[key]
+		while len(self.entries) > self.max_entries:
+			self.entries.popitem(last=False)
+
+	@staticmethod
+	def index_checksum(matrix: Optional[np.ndarray]) -> int:
+		return zlib.crc32(matrix.tobytes()) if matrix is not None else 0
+
+	def load(self):
+		if not os.path.exists(self.path):
+			return
+		try:
+			with open(self.path, "r", encoding="utf-8") as f:
+				stored = json.load(f)
+			items = stored["entries"]
+			matrix = np.load(self.index_path) if os.path.exists(self.index_path) else None
+		except Exception as e:
+			print("Cache load error:", e)
+			return
+		if matrix is not None and self.index_checksum(matrix) != stored.get("index_checksum"):
+			# Entries and index were written by different saves (crash in between),
+			# rows can't be trusted, exact lookups still work without embeddings
+			print("Cache index doesn't match entries, dropping embeddings")
+			matrix = None
+		for item in items:
+			row = item.pop("row", None)
+			valid_row = matrix is not None and row is not None and 0 <= row < len(matrix)
+			item["embedding"] = matrix[row].astype(np.float32) if valid_row else None
+			self.entries[item.pop("key")] = item
+		self.evict()
+
+	def save(self):
+		"""
+		Writes entries and embedding index to disk, replacing old files atomically.
+		Index is written first, entries file records its checksum, so load()
+		can tell when the two files come from different saves.
+		:return:
+		"""
+		with self.save_lock:
+			with self.lock:
+				stored, rows = [], []
+				for key, entry in self.entries.items():
+					item = {"key": key, "response": entry["response"], "created": entry["created"],
+					        "anchors": entry.get("anchors")}
+					if entry.get("embedding") is not None:
+						item["row"] = len(rows)
+						rows.append(entry["embedding"])
+					stored.append(item)
+			matrix = np.stack(rows).astype(np.float16) if rows else None
+			try:
+				if matrix is not None:
+					self.replace_file(self.index_path, lambda f: np.save(f, matrix), "wb")
+				self.replace_file(self.path, lambda f: json.dump(
+						{"entries": stored, "index_checksum": self.index_checksum(matrix)}, f), "w")
+			except Exception as e:
+				print("Cache save error:", e)
+
+	@staticmethod
+	def replace_file(path: str, write: Callable, mode: str):
+		"""
+		Writes through a unique temp file in the same directory, then swaps it in
+		:param path:
+		:param write: callable receiving the open temp file
+		:param mode: "w" or "wb"
+		:return:
+		"""
+		handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+		try:
+			with os.fdopen(handle, mode, **({"encoding": "utf-8"} if "b" not in mode else {})) as f:
+				write(f)
+			os.replace(temp_path, path)
+		except Exception:
+			if os.path.exists(temp_path):
+				os.remove(temp_path)
+			raise
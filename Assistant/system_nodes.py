@@ -1,8 +1,11 @@
 from agent_state import AgentState, get_new_state
 from langchain_core.messages import HumanMessage
+from checkpointing import trim_messages, MESSAGE_WINDOW
 
 def listen_to_query(state: AgentState):
 	"""Lister To User Query"""
 	user_query = input("User : ")
-	# return {"messages": [HumanMessage(content=user_query)], "steps": "", "llm":state["llm"]}
-	return get_new_state(state, messages=[HumanMessage(content=user_query)], steps="", current_step=0)
\ No newline at end of file
+	# return {"messages": [HumanMessage(content=user_query)], "steps": ""}
+	# Oldest messages are dropped as new ones come in, state and checkpoints stay same size all session
+	removals = trim_messages(state["messages"], MESSAGE_WINDOW - 1)
+	return get_new_state(state, messages=removals + [HumanMessage(content=user_query)], steps="", current_step=0)
\ No newline at end of file
@@ -0,0 +1,101 @@
+import sqlite3
+import time
+import zlib
+
+import pytest
+
+pytest.importorskip("langgraph.checkpoint.sqlite")
+pytest.importorskip("langchain_ollama")
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_ollama import ChatOllama
+from langgraph.graph import StateGraph, START, END
+from langgraph.runtime import get_runtime
+
+from agent_state import AgentState, AgentContext
+from checkpointing import PruningSqliteSaver, COMPRESSED_PREFIX, trim_messages
+
+SENTINEL_MODEL = "sentinel-model-for-checkpoint-test"
+KEEP_LAST = 5
+WINDOW = 6
+TURNS = 40
+# Upper bounds for one checkpoint once the message window is full, generous so slow machines pass
+MAX_CHECKPOINT_BYTES = 4096
+MAX_PUT_SECONDS = 0.05
+
+# Models reply() got from the runtime context, proves context reached the node
+models_seen = []
+
+def reply(state: AgentState):
+	llm = get_runtime(AgentContext).context.llm
+	models_seen.append(llm.model)
+	answer = AIMessage(content="Fixed answer " + "text " * 30)
+	return {"messages": trim_messages(state["messages"], WINDOW - 1) + [answer], "current_step": 0}
+
+@pytest.fixture
+def run_turns():
+	conn = sqlite3.connect(":memory:", check_same_thread=False)
+	saver = PruningSqliteSaver(conn, keep_last=KEEP_LAST)
+	put_times = []
+	put = saver.put
+
+	def timed_put(*args, **kwargs):
+		start = time.perf_counter()
+		saved_config = put(*args, **kwargs)
+		put_times.append(time.perf_counter() - start)
+		return saved_config
+
+	saver.put = timed_put
+	models_seen.clear()
+	graph = StateGraph(AgentState, context_schema=AgentContext)
+	graph.add_node("reply", reply)
+	graph.add_edge(START, "reply")
+	graph.add_edge("reply", END)
+	compiled = graph.compile(checkpointer=saver)
+
+	config = {"configurable": {"thread_id": "test"}}
+	context = AgentContext(llm=ChatOllama(model=SENTINEL_MODEL))
+
+	def run(turns: int):
+		sizes = []
+		for turn in range(turns):
+			user_message = HumanMessage(content=f"question number {turn} " + "words " * 30)
+			compiled.invoke({"messages": [user_message], "steps": "", "current_step": 0}, config, context=context)
+			row = conn.execute("SELECT length(checkpoint) FROM checkpoints ORDER BY checkpoint_id DESC LIMIT 1").fetchone()
+			sizes.append(row[0])
+		return saver, conn, sizes, put_times
+	return run
+
+def raw_payload(type_name: str, blob: bytes) -> bytes:
+	if type_name.startswith(COMPRESSED_PREFIX):
+		return zlib.decompress(blob)
+	return blob
+
+def test_model_is_not_part_of_checkpoints(run_turns):
+	saver, conn, _, _ = run_turns(3)
+	assert models_seen == [SENTINEL_MODEL] * 3
+	rows = conn.execute("SELECT type, checkpoint FROM checkpoints").fetchall()
+	assert rows
+	for type_name, blob in rows:
+		checkpoint = saver.serde.loads_typed((type_name, blob))
+		assert "llm" not in checkpoint["channel_values"]
+		payload = raw_payload(type_name, blob)
+		assert b"ChatOllama" not in payload
+		assert SENTINEL_MODEL.encode() not in payload
+
+	writes = conn.execute("SELECT type, value FROM writes").fetchall()
+	for type_name, blob in writes:
+		assert b"ChatOllama" not in raw_payload(type_name, blob)
+
+def test_checkpoint_size_stays_flat(run_turns):
+	saver, conn, sizes, put_times = run_turns(TURNS)
+	# Once message window is full, checkpoints stop growing with the session
+	settled = sizes[WINDOW * 2:]
+	assert max(settled) <= min(settled) * 1.1, sizes
+	# and stay cheap to write
+	assert max(settled) <= MAX_CHECKPOINT_BYTES, sizes
+	settled_puts = put_times[len(put_times) // 2:]
+	assert sum(settled_puts) / len(settled_puts) <= MAX_PUT_SECONDS, put_times
+	# Pruning keeps a fixed number of checkpoints per thread
+	stored = conn.execute("SELECT count(*) FROM checkpoints").fetchone()[0]
+	assert stored <= KEEP_LAST
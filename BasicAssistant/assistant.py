@@ -1,14 +1,18 @@
-from typing import TypedDict, List, Dict, Any
+from typing import Annotated, TypedDict, List, Dict, Any
 import os
-from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
 from langchain_ollama import ChatOllama
 from langgraph.graph import StateGraph, START, END
+from langgraph.graph.message import add_messages
 from rich.console import Console
 import re
 import json
+import time
+import operator
 
 from assistant_tools import get_time, calc, http_get, launch_app
-from assistant_prompts import SYSTEM_PROMPT
+from assistant_prompts import SYSTEM_PROMPT, NATIVE_TOOL_SYSTEM_PROMPT
+from tool_executor import ToolExecutor
 
 console = Console()
 
@@ -23,10 +27,17 @@ tools_map = {tool.name: tool for tool in available_tools}
 # AGENT STATE
 # ---------------------------------------------------------------------------------------------------
 class AgentState(TypedDict):
-	messages: List[BaseMessage]
+	# Messages of current turn only, nodes return new messages and add_messages appends them
+	messages: Annotated[List[BaseMessage], add_messages]
+	# Earlier turns, already cut down to HISTORY_WINDOW by the caller
+	history: List[BaseMessage]
 	iterations: int
+	# One entry per node run in current turn, used to spot wasted model calls
+	trace: Annotated[List[Dict[str, Any]], operator.add]
 
 MAX_ITER = 8
+# Number of earlier messages sent along with current turn, keeps model input independent of session length
+HISTORY_WINDOW = 12
 
 # ---------------------------------------------------------------------------------------------------
 # LOCAL OLLAMA SETUP
@@ -43,116 +54,172 @@ model = ChatOllama(
 		repeat_penalty=1.1  # Prevent repetitive response
 )
 
+# "native" lets Ollama return structured tool_calls, "json" parses ACTION_JSON out of the reply text
+TOOL_CALLING = os.getenv("TOOL_CALLING", "native")
+# Seconds a tool may take before the agent moves on without its result
+TOOL_TIMEOUTS = {"get_time": 2, "calc": 2, "http_get": 12, "launch_app": 5}
+
+tool_model = model.bind_tools(available_tools)
+# Tool calls returned together in one response run concurrently, each bounded by its timeout
+tool_executor = ToolExecutor(tools_map, TOOL_TIMEOUTS, max_workers=4)
+
+if TOOL_CALLING == "native":
+	SYSTEM_MESSAGE = SystemMessage(content=NATIVE_TOOL_SYSTEM_PROMPT)
+else:
+	SYSTEM_MESSAGE = SystemMessage(content=SYSTEM_PROMPT)
+
 # ---------------------------------------------------------------------------------------------------
 # AGENT FUNCTIONS
 # ---------------------------------------------------------------------------------------------------
-def should_continue(state: AgentState) -> str:
+def stop_reason(state: AgentState):
 	"""
-	Determines the next node in the conversation flow.
-	This prevents infinite loops by limiting the number of iterations.
+	Why the agent loop should end after latest model response
 	:param state:
-	:return:
+	:return: "final_answer", "no_action", "max_iterations" or None when a tool call is pending
 	"""
+	last_message = state["messages"][-1]
+	if TOOL_CALLING == "native":
+		if not getattr(last_message, "tool_calls", None):
+			return "final_answer"
+	else:
+		content = last_message.content if isinstance(last_message, AIMessage) else ""
+		if "FINAL_ANSWER" in content:
+			return "final_answer"
+		if "ACTION_JSON" not in content:
+			return "no_action"
 	# Safely check: stop if we've hit the maximum iteration limit
 	# This prevents runaway conversation that could consume resources
 	if state["iterations"] >= MAX_ITER:
+		return "max_iterations"
+	return None
+
+def should_continue(state: AgentState) -> str:
+	"""
+	Determines the next node in the conversation flow.
+	Model is called again only after a tool ran, a final answer or
+	a reply without tool call ends the turn right away.
+	:param state:
+	:return:
+	"""
+	if stop_reason(state) is not None:
 		return END  # Terminal the conversation graph
-	return "agent"  # Continue to the agent node for another response
+	return "tools"  # Run requested tool, its result goes back to the agent
+
+def history_window(messages: List[BaseMessage], size: int = HISTORY_WINDOW) -> List[BaseMessage]:
+	"""
+	Most recent messages of earlier turns, window always starts at a user message
+	so the model never sees a tool result or answer without its question
+	:param messages: complete conversation so far
+	:param size: maximum number of messages to keep
+	:return:
+	"""
+	window = messages[-size:] if size > 0 else []
+	for index, message in enumerate(window):
+		if isinstance(message, HumanMessage):
+			return window[index:]
+	return []
 
 def call_model(state: AgentState) -> Dict[str, Any]:
-	messages = state["messages"]
 	iterations = state["iterations"]
 
-	# Ensure system prompt is always present at the beginning of conversation
+	# System prompt is added only for the call, it is never stored in the state
 	# This maintains consistent behavior and tool-calling format throughout the session
-	if not messages or not isinstance(messages[0], SystemMessage):
-		# Prepend system message to establish the agent's behavior and response format
-		messages = [SystemMessage(content=SYSTEM_PROMPT)] + messages
+	messages = [SYSTEM_MESSAGE] + state.get("history", []) + state["messages"]
 
+	start = time.perf_counter()
 	try:
-		response = model.invoke(messages)
-		new_messages = messages + [response]
+		if TOOL_CALLING == "native":
+			response = tool_model.invoke(messages)
+		else:
+			response = model.invoke(messages)
 
 		return {
-				"messages": new_messages,
-				"iterations": iterations + 1
+				"messages": [response],
+				"iterations": iterations + 1,
+				"trace": [{"node": "agent", "seconds": time.perf_counter() - start}]
 		}
 	except Exception as e:
 		error_msg = f"Model_error: {str(e)}"
 		console.print(f"[red]{error_msg}[/red]")
 		error_response = AIMessage(content=f"FINAL_ANSWER: I encountered an error: {error_msg}")
 		return {
-				"messages": messages + [error_response],
-				"iterations": iterations + 1
+				"messages": [error_response],
+				"iterations": iterations + 1,
+				"trace": [{"node": "agent", "seconds": time.perf_counter() - start, "error": True}]
 		}
 
-def execute_tools(state: AgentState) -> Dict[str, Any]:
-	messages = state["messages"]
-	iterations = state["iterations"]
-
-	last_message = messages[-1]
-	if not isinstance(last_message, AIMessage):
-		return {"messages": messages, "iterations": iterations}
-
-	content = last_message.content.strip()
-
-	# Check if this is a final answer
-	if "FINAL_ANSWER" in content:
-		return {"messages": messages, "iterations": iterations}
+def parse_action_json(content: str) -> Dict[str, Any]:
+	"""
+	Extracts tool call written as ACTION_JSON: {...}.
+	JSON is decoded from the first brace onwards, so nested args are read completely.
+	:param content:
+	:return: parsed tool call, or None when reply has no ACTION_JSON
+	"""
+	action_match = re.search(r'ACTION_JSON:\s*(?=\{)', content)
+	if not action_match:
+		return None
+	action_data, _ = json.JSONDecoder().raw_decode(content, action_match.end())
+	return action_data
 
-	# Try to extract and execute tool call
+def execute_native_tool_calls(last_message: AIMessage) -> Dict[str, Any]:
+	"""
+	Runs structured tool_calls of the model response, calls from the same response
+	run concurrently and each result goes back as a ToolMessage tied to its call id
+	:param last_message:
+	:return:
+	"""
+	tool_calls = last_message.tool_calls
+	start = time.perf_counter()
+	results = tool_executor.run_all(tool_calls)
+	seconds = time.perf_counter() - start
+
+	tool_messages = [
+			ToolMessage(content=result, tool_call_id=call["id"], name=call["name"])
+			for call, result in zip(tool_calls, results)
+	]
+	trace = [{"node": "tools", "tool": call["name"], "seconds": seconds} for call in tool_calls]
+	return {"messages": tool_messages, "trace": trace}
+
+def execute_json_tool_call(content: str) -> Dict[str, Any]:
 	try:
-		# Use regex to extract JSON tool call from the AI's structured response
-		# DOTALL flag allows matching across newlines in case JSON spans multiple lines
-		action_match = re.search(r'ACTION_JSON:\s*(\{.*?\})', content, re.DOTALL)
-		if not action_match:
-			# No tool call pattern found, assume this is a final answer that needs no tools
-			return {"messages": messages, "iterations": iterations}
-
-		# Extract the json portion from the regex match (group 1)
-		action_json = action_match.group()
-		# Parse the JSON string into a Python dictionary
-		action_data = json.loads(action_json)
+		action_data = parse_action_json(content)
+		if action_data is None:
+			# ACTION_JSON was written without a JSON object after it
+			raise json.JSONDecodeError("Expecting '{' after ACTION_JSON", content, 0)
 
 		# Extract tool name and arguments from the parse JSON structure
 		tool_name = action_data.get("tool")
 		tool_args = action_data.get("args", {}) # Default to empty dict if no args provided
-
-		if tool_name not in tools_map:
-			result = f"Error: Unknown tool '{tool_name}'"
-		else:
-			tool = tools_map[tool_name]
-			try:
-				if tool_args:
-					result = tool.invoke(tool_args)
-				else:
-					result = tool.invoke({})
-			except Exception as e:
-				result = f"Tool execution error: {str(e)}"
+		start = time.perf_counter()
+		result = tool_executor.run(tool_name, tool_args)
+		step = {"node": "tools", "tool": tool_name, "seconds": time.perf_counter() - start}
 
 		# Feed the tool's output back to the agent as a human message
 		# This creates a conversation flow: User -> AI -> Tool -> AI (with tool result)
 		tool_message = HumanMessage(content=f"Total result: {result}")
-		new_messages = messages + [tool_message]
-
-		return {
-				"messages": new_messages,
-				"iterations": iterations
-		}
+		return {"messages": [tool_message], "trace": [step]}
 	except json.JSONDecodeError as e:
 		error_msg = f"JSON parsing error: {str(e)}. Please use exact format: ACTION_JSON: {{\"tool\": \"tool_name\", \"args\": {{...}}}}"
-		error_message = HumanMessage(content=f"Error: {error_msg}")
-		return {
-				"messages": messages + [error_message],
-				"iterations": iterations
-		}
 	except Exception as e:
 		error_msg = f"Tool execution error: {str(e)}"
-		error_message = HumanMessage(content=f"Error: {error_msg}")
-		return {
-				"messages": messages + [error_message],
-				"iterations": iterations
-		}
+
+	error_message = HumanMessage(content=f"Error: {error_msg}")
+	return {
+			"messages": [error_message],
+			"trace": [{"node": "tools", "tool": None, "seconds": 0.0, "error": True}]
+	}
+
+def execute_tools(state: AgentState) -> Dict[str, Any]:
+	last_message = state["messages"][-1]
+	if not isinstance(last_message, AIMessage):
+		return {"iterations": state["iterations"]}
+
+	if TOOL_CALLING == "native":
+		update = execute_native_tool_calls(last_message)
+	else:
+		update = execute_json_tool_call(last_message.content.strip())
+	update["iterations"] = state["iterations"]
+	return update
 
 # Create the graph
 workflow = StateGraph(AgentState)
@@ -160,7 +227,7 @@ workflow.add_node("agent", call_model)
 workflow.add_node("tools", execute_tools)
 
 workflow.set_entry_point("agent")
-workflow.add_conditional_edges("agent", should_continue, {"agent": "tools", END:END})
+workflow.add_conditional_edges("agent", should_continue, {"tools": "tools", END:END})
 workflow.add_edge("tools", "agent")
 
 app = workflow.compile()
@@ -176,12 +243,31 @@ def pretty_print_last(state: AgentState):
 	except Exception as e:
 		console.print(f"[red]Print error: {e}[/]")
 
+def print_turn_trace(state: AgentState, seconds: float):
+	"""
+	One line summary of the turn, shows how many model and tool calls it took and why it stopped
+	:param state: final state of the turn
+	:param seconds: wall time of the turn
+	:return:
+	"""
+	trace = state.get("trace", [])
+	model_calls = [step for step in trace if step["node"] == "agent"]
+	tool_calls = [step for step in trace if step["node"] == "tools"]
+	model_seconds = sum(step["seconds"] for step in model_calls)
+	tools_used = ", ".join(str(step.get("tool")) for step in tool_calls) or "none"
+	console.print(
+			f"[dim]Turn: {state['iterations']} iterations, {len(model_calls)} model calls ({model_seconds:.2f}s), "
+			f"{len(tool_calls)} tool calls ({tools_used}), stopped on {stop_reason(state) or 'tool'}, "
+			f"{seconds:.2f}s total[/]"
+	)
+
 def run_interactive():
 	console.print(f"[bold]Local Agent ready (model={OLLAMA_MODEL} base={OLLAMA_BASEURL})[/]")
 	console.print("[dim]Available tools: get_time, calc, http_get, launch_app[/]")
 	console.print("[dim]Type 'quit' or press Ctrl+C to exit[/]")
 
-	chat_state: AgentState = {"messages": [], "iterations": 0}
+	# Append-only transcript of finished turns, only its tail is handed to the graph
+	transcript: List[BaseMessage] = []
 
 	while True:
 		try:
@@ -197,22 +283,31 @@ def run_interactive():
 			print("Goodbye!")
 			break
 
-		# Add the user's input to the conversation history as a HumanMessage
-		chat_state["messages"].append(HumanMessage(content=user_in))
-		# Reset iterator counter for each new user input to prevent cross-turn limits
-		chat_state["iterations"] = 0    # Each user turn gets fresh MAX_ITER attempts
+		# Each turn starts with only the user's input, earlier turns come in as a bounded window
+		turn_state: AgentState = {
+				"messages": [HumanMessage(content=user_in)],
+				"history": history_window(transcript),
+				"iterations": 0,    # Each user turn gets fresh MAX_ITER attempts
+				"trace": []
+		}
 
 		try:
 			# Execute the Langgraph workflow: agent -> tools -> agent ... until END
 			# This runs the complete reasoning loop including tool calls and responses
-			final_state = app.invoke(chat_state)
-			chat_state = final_state    # Update state with the complete conversation
-			pretty_print_last(chat_state)
+			start = time.perf_counter()
+			final_state = app.invoke(turn_state)
+			transcript.extend(final_state["messages"])
+			pretty_print_last(final_state)
+			print_turn_trace(final_state, time.perf_counter() - start)
+
+		except KeyboardInterrupt:
+			# Ctrl+C during a turn drops queued tool calls and returns to the prompt
+			cancelled = tool_executor.cancel_all()
+			console.print(f"[yellow]Turn interrupted, {cancelled} tool calls cancelled[/]")
 
 		except Exception as e:
+			# Failed turn is not kept, so it can't poison following turns
 			console.print(f"[red]Error during execution: {e}[/]")
-			# reset state on error
-			chat_state = {"messages": [], "iterations": 0}
 
 # ---------------------------------------------------------------------------------------------------
 if __name__ == "__main__":
@@ -2,9 +2,10 @@ from langchain.tools import tool
 from datetime import datetime
 import ast
 import requests
-import subprocess
 import operator
 
+from tool_executor import launch_detached
+
 @tool
 def get_time() -> str:
 	"""Return current UTC time in ISO format."""
@@ -121,48 +122,24 @@ def launch_app(app_name: str) -> str:
 		import platform
 		system = platform.system().lower()
 
+		# Launched detached, GUI apps keep running and the agent doesn't wait for them to exit
 		if system == 'windows':
 			# Windows: user 'start' command
-			result = subprocess.run(
-					['cmd', '/c', 'start', '', app_name],
-					capture_output=True,
-					text=True,
-					timeout=5
-			)
+			result = launch_detached(['cmd', '/c', 'start', '', app_name])
 		else:
 			# Linux: user appropriate commands
-			if app_name.startswith(('http://', 'http://')):
+			if app_name.startswith(('http://', 'https://')):
 				# Open the url in default browser
-				result = subprocess.run(
-						['xdg-open', app_name],
-						capture_output=True,
-						text=True,
-						timeout=5
-				)
+				result = launch_detached(['xdg-open', app_name])
 			else:
 				# Launch application
 				# Try direct command first, fallback xdg-open
 				try:
-					result = subprocess.run(
-							[app_name],
-							capture_output=True,
-							text=True,
-							timeout=5
-					)
+					result = launch_detached([app_name])
 				except FileNotFoundError:
 					# Fallback to xdg-open for applications
-					result = subprocess.run(
-							['xdg-open', app_name],
-							capture_output=True,
-							text=True,
-							timeout=5
-					)
-		if result.returncode == 0:
-			return f"Successfully launch {app_name} on {system.title()}"
-		else:
-			return f"Failed to launch {app_name}: {result.stderr}"
+					result = launch_detached(['xdg-open', app_name])
+		return f"{result} on {system.title()}"
 
-	except subprocess.TimeoutExpired:
-		return f"Timeout launching {app_name}"
 	except Exception as e:
 		return f"Launch Error : {str(e)}"
\ No newline at end of file
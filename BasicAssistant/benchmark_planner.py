@@ -0,0 +1,77 @@
+import time
+
+import BasicAssistant.instruction_breaker as pipeline
+from BasicAssistant.step_router import StepRouter
+from BasicAssistant.test_prompt import INSTRUCTION_BREAKDOWN_TEST_1, INSTRUCTION_BREAKDOWN_TEST_2
+
+# Compares single structured planning call against multi-call path
+# (instruction breaker -> steps parser -> one routing call per step)
+# Run from repository root : python -m BasicAssistant.benchmark_planner
+
+QUERIES = [
+		"Hi buddy, Can you please open YouTube for me. And also can you answer what is the best way to learn machine learning",
+		INSTRUCTION_BREAKDOWN_TEST_1,
+		INSTRUCTION_BREAKDOWN_TEST_2,
+]
+
+class CountingModel:
+	"""
+	Wraps a chat model and counts invoke calls
+	"""
+	def __init__(self, model):
+		self.model = model
+		self.calls = 0
+
+	def invoke(self, *args, **kwargs):
+		self.calls += 1
+		return self.model.invoke(*args, **kwargs)
+
+def new_state(query: str) -> pipeline.AgentState:
+	return {**pipeline.initial_state, "messages": [], "user_query": query}
+
+def route_all(state: pipeline.AgentState):
+	nodes = []
+	for index in range(len(state["steps"])):
+		state = pipeline.get_new_agent_state(state, current_step=index)
+		nodes.append(pipeline.decide_next_action(state))
+	return nodes
+
+def run_multi_call(query: str):
+	state = pipeline.instruction_breaker(new_state(query))
+	state = pipeline.steps_parser(state)
+	return state["steps"], route_all(state)
+
+def run_structured(query: str):
+	state = pipeline.structured_planner(new_state(query))
+	if not state["steps"]:
+		return run_multi_call(query)
+	return state["steps"], route_all(state)
+
+def measure(name: str, runner, query: str):
+	pipeline.model.calls = 0
+	pipeline.planner_model.calls = 0
+	start = time.perf_counter()
+	steps, nodes = runner(query)
+	elapsed = time.perf_counter() - start
+	calls = pipeline.model.calls + pipeline.planner_model.calls
+	print(f"{name:<12} steps={len(steps):<3} calls={calls:<3} time={elapsed:.2f}s  nodes={nodes}")
+	return calls, elapsed
+
+if __name__ == "__main__":
+	pipeline.model = CountingModel(pipeline.model)
+	pipeline.planner_model = CountingModel(pipeline.planner_model)
+	# Measure multi-call path as it was, every step routed by the LLM
+	pipeline.router = StepRouter(confidence_threshold=1.1)
+
+	totals = {"multi-call": [0, 0.0], "structured": [0, 0.0]}
+	for query in QUERIES:
+		print("=" * 40)
+		print(query.strip()[:80])
+		for name, runner in (("multi-call", run_multi_call), ("structured", run_structured)):
+			calls, elapsed = measure(name, runner, query)
+			totals[name][0] += calls
+			totals[name][1] += elapsed
+
+	print("=" * 40)
+	for name, (calls, elapsed) in totals.items():
+		print(f"{name:<12} total calls={calls:<3} total time={elapsed:.2f}s")
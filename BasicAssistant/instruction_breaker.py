@@ -1,19 +1,81 @@
 from langchain_ollama.chat_models import  ChatOllama
+from langchain_ollama import OllamaEmbeddings
 from typing import TypedDict, List
 import json
+import os
 from langgraph.graph import StateGraph, START, END
 
-from BasicAssistant.assistant_prompts import INSTRUCTION_BREAK_DOWN_PROMPT, NEXT_NODE_DECIDER_PROMPT, ARRAY_FORMATTER_PROMPT
+from BasicAssistant.assistant_prompts import INSTRUCTION_BREAK_DOWN_PROMPT, NEXT_NODE_DECIDER_PROMPT, ARRAY_FORMATTER_PROMPT, STRUCTURED_PLAN_PROMPT, ANSWER_QUERY_PROMPT
+from BasicAssistant.step_router import StepRouter, CentroidClassifier
+from BasicAssistant.step_executor import run_steps_dag
+from Assistant.response_cache import ResponseCache
 # from BasicAssistant.test_prompt import INSTRUCTION_BREAKDOWN_TEST_1, INSTRUCTION_BREAKDOWN_TEST_2
 
 OLLAMA_MODEL = "llama3.1:8b-instruct-q4_1"
 REASONING = False
+# Embedding centroid classifier is consulted when keyword rules are not confident
+ROUTER_EMBEDDINGS = False
+EMBEDDING_MODEL = "nomic-embed-text"
+
+# One schema constrained call returns every step with its node, instead of N+2 separate calls
+STRUCTURED_PLANNING = True
+# Planned steps run as a dependency graph, independent steps concurrently
+PARALLEL_STEPS = True
+MAX_PARALLEL_STEPS = 4
+STEP_TIMEOUTS = {
+		"LaunchApplication": 10,
+		"PlayVideo": 15,
+		"OpenWebsite": 10,
+		"QueryAssistant": 90,
+		"QuitConversation": 5,
+}
+
+NODE_NAMES = ["LaunchApplication", "PlayVideo", "OpenWebsite", "QueryAssistant", "QuitConversation"]
+
+PLAN_SCHEMA = {
+		"type": "object",
+		"properties": {
+				"steps": {
+						"type": "array",
+						"items": {
+								"type": "object",
+								"properties": {
+										"instruction": {"type": "string"},
+										"node": {"type": "string", "enum": NODE_NAMES},
+										"arguments": {
+												"type": "object",
+												"properties": {"target": {"type": "string"}},
+												"required": ["target"]
+										},
+										"depends_on": {"type": "array", "items": {"type": "integer"}}
+								},
+								"required": ["instruction", "node", "arguments", "depends_on"]
+						}
+				}
+		},
+		"required": ["steps"]
+}
 
 model = ChatOllama(
 		model = OLLAMA_MODEL,
 		reasoning = REASONING
 )
 
+planner_model = ChatOllama(
+		model = OLLAMA_MODEL,
+		reasoning = REASONING,
+		format = PLAN_SCHEMA
+)
+
+answer_cache = ResponseCache(
+		os.path.join(os.path.dirname(os.path.abspath(__file__)), "answer_cache.json"),
+		embed=OllamaEmbeddings(model=EMBEDDING_MODEL).embed_query if ROUTER_EMBEDDINGS else None
+)
+
+router = StepRouter(
+		classifier=CentroidClassifier(OllamaEmbeddings(model=EMBEDDING_MODEL).embed_documents) if ROUTER_EMBEDDINGS else None
+)
+
 # messages = [
 # 		("system", INSTRUCTION_BREAK_DOWN_PROMPT),
 # 		("user", INSTRUCTION_BREAKDOWN_TEST_1)
@@ -38,14 +100,16 @@ class AgentState(TypedDict):
 	raw_steps: str
 	steps: List
 	current_step: int
+	step_results: List
 
-def get_new_agent_state(state: AgentState, messages:List = None, user_query:str = None, raw_steps:str = None, steps:List = None, current_step:int = None) -> AgentState:
+def get_new_agent_state(state: AgentState, messages:List = None, user_query:str = None, raw_steps:str = None, steps:List = None, current_step:int = None, step_results:List = None) -> AgentState:
 	return {
 			"messages": messages if messages is not None else state["messages"],
 			"user_query": user_query if user_query is not None else state["user_query"],
 			"raw_steps": raw_steps if raw_steps is not None else state["raw_steps"],
 			"steps": steps if steps is not None else state["steps"],
-			"current_step": current_step if current_step is not None else state["current_step"]
+			"current_step": current_step if current_step is not None else state["current_step"],
+			"step_results": step_results if step_results is not None else state["step_results"]
 	}
 
 def instruction_breaker(state: AgentState) -> AgentState:
@@ -65,7 +129,45 @@ def instruction_breaker(state: AgentState) -> AgentState:
 
 	raw_steps = str(response.content)
 
-	return get_new_agent_state(state, raw_steps=raw_steps, steps=[], current_step=-1)
+	return get_new_agent_state(state, raw_steps=raw_steps, steps=[], current_step=-1, step_results=[])
+
+def structured_planner(state: AgentState) -> AgentState:
+	"""
+	Breaks user query into steps and routes every step in a single
+	JSON schema constrained call. Leaves steps empty if output can't be used,
+	so graph falls back to multi-call path.
+	:param state:
+	:return:
+	"""
+	messages = [
+		("system", STRUCTURED_PLAN_PROMPT),
+		("user", state["user_query"])
+	]
+
+	response = planner_model.invoke(messages)
+	raw_steps = str(response.content)
+
+	try:
+		steps = json.loads(raw_steps)["steps"]
+		steps = [step for step in steps if step.get("node") in NODE_NAMES and step.get("instruction")]
+	except (json.decoder.JSONDecodeError, KeyError, TypeError, AttributeError) as e:
+		print(f"Structured planning failed ({e}), falling back to step by step planning")
+		steps = []
+
+	return get_new_agent_state(state, raw_steps=raw_steps, steps=steps, current_step=-1, step_results=[])
+
+def after_structured_planner(state: AgentState) -> str:
+	if not state["steps"]:
+		return "InstructionBreaker"
+	return "StepsExecutor" if PARALLEL_STEPS else "StepsIterator"
+
+def step_instruction(step) -> str:
+	"""
+	Text of a step, steps are plain strings or structured planner dicts
+	:param step:
+	:return:
+	"""
+	return step["instruction"] if isinstance(step, dict) else str(step)
 
 def listener(state: AgentState) -> AgentState:
 	"""
@@ -114,15 +216,66 @@ def steps_iterator(state: AgentState) -> AgentState:
 	current_step += 1
 	return get_new_agent_state(state, current_step=current_step)
 
+def launch_application(action) -> str:
+	"""
+	Launches requested application
+	:param action: step to execute
+	:return: step result
+	"""
+	print(f"[Launch Node] Executing Action : {action}")
+	return f"Launched : {step_instruction(action)}"
+
+def play_video(action) -> str:
+	"""
+	Plays requested video on YouTube
+	:param action: step to execute
+	:return: step result
+	"""
+	print(f"[Play Node] Executing Action : {action}")
+	return f"Playing : {step_instruction(action)}"
+
+def open_website(action) -> str:
+	"""
+	Opens requested website
+	:param action: step to execute
+	:return: step result
+	"""
+	print(f"[Open Website Node] Executing Action : {action}")
+	return f"Opened : {step_instruction(action)}"
+
+def answer_query(action) -> str:
+	"""
+	Answers user's query
+	:param action: step to execute
+	:return: answer
+	"""
+	print(f"[Query Assistant Node] Executing Action : {action}")
+	question = step_instruction(action)
+	answer = answer_cache.get(question)
+	if answer is None:
+		messages = [
+				("system", ANSWER_QUERY_PROMPT),
+				("user", question)
+		]
+		answer = str(model.invoke(messages).content)
+		answer_cache.put(question, answer)
+	print(f"[Query Assistant Node] Answer : {answer}")
+	return answer
+
+def record_step_result(state: AgentState, result: str) -> List:
+	results = list(state["step_results"])
+	results.extend([None] * (len(state["steps"]) - len(results)))
+	results[state["current_step"]] = result
+	return results
+
 def launch_node(state: AgentState) -> AgentState:
 	"""
 	Launches requested application
 	:param state:
 	:return:
 	"""
-	action = state["steps"][state["current_step"]]
-	print(f"[Launch Node] Executing Action : {action}")
-	return get_new_agent_state(state)
+	result = launch_application(state["steps"][state["current_step"]])
+	return get_new_agent_state(state, step_results=record_step_result(state, result))
 
 def play_node(state: AgentState) -> AgentState:
 	"""
@@ -130,9 +283,8 @@ def play_node(state: AgentState) -> AgentState:
 	:param state:
 	:return:
 	"""
-	action = state["steps"][state["current_step"]]
-	print(f"[Play Node] Executing Action : {action}")
-	return get_new_agent_state(state)
+	result = play_video(state["steps"][state["current_step"]])
+	return get_new_agent_state(state, step_results=record_step_result(state, result))
 
 def open_website_node(state: AgentState) -> AgentState:
 	"""
@@ -140,9 +292,8 @@ def open_website_node(state: AgentState) -> AgentState:
 	:param state:
 	:return:
 	"""
-	action = state["steps"][state["current_step"]]
-	print(f"[Open Website Node] Executing Action : {action}")
-	return get_new_agent_state(state)
+	result = open_website(state["steps"][state["current_step"]])
+	return get_new_agent_state(state, step_results=record_step_result(state, result))
 
 def answer_query_node(state: AgentState) -> AgentState:
 	"""
@@ -150,9 +301,8 @@ def answer_query_node(state: AgentState) -> AgentState:
 	:param state:
 	:return:
 	"""
-	action = state["steps"][state["current_step"]]
-	print(f"[Query Assistant Node] Executing Action : {action}")
-	return get_new_agent_state(state)
+	result = answer_query(state["steps"][state["current_step"]])
+	return get_new_agent_state(state, step_results=record_step_result(state, result))
 
 def quit_node(state: AgentState) -> AgentState:
 	"""
@@ -164,6 +314,43 @@ def quit_node(state: AgentState) -> AgentState:
 	print(f"[Quit Node] Executing Action : {action}")
 	return get_new_agent_state(state)
 
+STEP_ACTIONS = {
+		"LaunchApplication": launch_application,
+		"PlayVideo": play_video,
+		"OpenWebsite": open_website,
+		"QueryAssistant": answer_query,
+}
+
+def steps_executor(state: AgentState) -> AgentState:
+	"""
+	Executes planned steps as a dependency graph, independent steps run
+	concurrently and results are merged back in step order
+	:param state:
+	:return:
+	"""
+	steps = state["steps"]
+	# Planner numbers steps from 1
+	dependencies = [[d - 1 for d in step.get("depends_on", []) if isinstance(d, int)] for step in steps]
+	timeouts = [STEP_TIMEOUTS.get(step["node"]) for step in steps]
+
+	def execute(index, step):
+		if step["node"] == "QuitConversation":
+			return "Quit requested"
+		return STEP_ACTIONS[step["node"]](step)
+
+	results = run_steps_dag(steps, execute, dependencies=dependencies, timeouts=timeouts, max_workers=MAX_PARALLEL_STEPS)
+	for index, result in enumerate(results):
+		print(f"Step {index + 1} - {steps[index]['instruction']} : {result}")
+
+	quit_steps = [index for index, step in enumerate(steps) if step["node"] == "QuitConversation"]
+	current_step = quit_steps[0] if quit_steps else len(steps)
+	return get_new_agent_state(state, step_results=results, current_step=current_step)
+
+def after_steps_executor(state: AgentState) -> str:
+	if state["current_step"] < len(state["steps"]):
+		return "QuitConversation"
+	return "Listener"
+
 def functionality_not_implemented_node(state: AgentState) -> AgentState:
 	"""
 	This node should be called if requested action
@@ -190,7 +377,18 @@ def decide_next_action(state: AgentState) -> str:
 
 	step = state["steps"][current_step]
 
-	print(f"Executing Step : {current_step + 1} - {step}")
+	print(f"Executing Step : {current_step + 1} - {step_instruction(step)}")
+
+	# Structured planner has already routed this step
+	if isinstance(step, dict):
+		print(f"Next Node : {step['node']} (planner)")
+		return step["node"]
+
+	# Obvious steps are routed locally, LLM is only asked when rules are not confident
+	node = router.route(step)
+	if node is not None:
+		print(f"Next Node : {node} (local router)")
+		return node
 
 	messages = [
 			("system", NEXT_NODE_DECIDER_PROMPT),
@@ -200,7 +398,8 @@ def decide_next_action(state: AgentState) -> str:
 
 	print(f"Next Node : {response.content}")
 
-	return response.content
+	node = response.content.strip()
+	return node if node in NODE_NAMES else "QueryAssistant"
 
 def print_agent_state(state: AgentState):
 	"""
@@ -226,13 +425,18 @@ def print_agent_state(state: AgentState):
 	for step in steps:
 		print(step)
 
+	print("-" * 40)
+	print(router.report())
+
 
 gideon_builder = StateGraph(AgentState)
 
 gideon_builder.add_node("Listener", listener)
+gideon_builder.add_node("StructuredPlanner", structured_planner)
 gideon_builder.add_node("InstructionBreaker", instruction_breaker)
 gideon_builder.add_node("StepsParser", steps_parser)
 gideon_builder.add_node("StepsIterator", steps_iterator)
+gideon_builder.add_node("StepsExecutor", steps_executor)
 gideon_builder.add_node("LaunchApplication", launch_node)
 gideon_builder.add_node("PlayVideo", play_node)
 gideon_builder.add_node("OpenWebsite", open_website_node)
@@ -241,7 +445,22 @@ gideon_builder.add_node("QuitConversation", quit_node)
 
 gideon_builder.add_edge(START, "Listener")
 
-gideon_builder.add_edge("Listener", "InstructionBreaker")
+gideon_builder.add_edge("Listener", "StructuredPlanner" if STRUCTURED_PLANNING else "InstructionBreaker")
+gideon_builder.add_conditional_edges(
+		"StructuredPlanner",
+		after_structured_planner,
+		{
+				"StepsIterator": "StepsIterator",
+				"StepsExecutor": "StepsExecutor",
+				"InstructionBreaker": "InstructionBreaker"
+		})
+gideon_builder.add_conditional_edges(
+		"StepsExecutor",
+		after_steps_executor,
+		{
+				"QuitConversation": "QuitConversation",
+				"Listener": "Listener"
+		})
 gideon_builder.add_edge("InstructionBreaker", "StepsParser")
 gideon_builder.add_edge("StepsParser", "StepsIterator")
 gideon_builder.add_conditional_edges(
@@ -269,9 +488,11 @@ initial_state : AgentState = {
 		"user_query": "",
 		"raw_steps": "",
 		"steps": [],
-		"current_step": -1
+		"current_step": -1,
+		"step_results": []
 }
 
-final_state = gideon.invoke(initial_state, {"recursion_limit": 100})
+if __name__ == "__main__":
+	final_state = gideon.invoke(initial_state, {"recursion_limit": 100})
 
-print_agent_state(final_state)
\ No newline at end of file
+	print_agent_state(final_state)
\ No newline at end of file
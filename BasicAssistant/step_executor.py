@@ -0,0 +1,131 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, List, Sequence
+
+# How often queued steps are checked for having started, when no running step has a deadline yet
+QUEUED_POLL_INTERVAL = 0.05
+
+def parse_dependencies(step_count: int, dependencies: Sequence[Sequence[int]]) -> List[List[int]]:
+	"""
+	Cleans dependency annotations, only earlier steps are kept, so graph is always acyclic
+	:param step_count:
+	:param dependencies: for every step, indexes of steps it depends upon
+	:return:
+	"""
+	cleaned = []
+	for index in range(step_count):
+		depends_on = dependencies[index] if index < len(dependencies) and dependencies[index] else []
+		valid = set()
+		for d in depends_on:
+			# Annotations come from the model, anything which isn't a step number is ignored
+			try:
+				d = int(d)
+			except (TypeError, ValueError):
+				continue
+			if 0 <= d < index:
+				valid.add(d)
+		cleaned.append(sorted(valid))
+	return cleaned
+
+def run_steps_dag(steps: Sequence[Any], execute: Callable[[int, Any], Any],
+                  dependencies: Sequence[Sequence[int]] = None, timeouts: Sequence[float] = None,
+                  default_timeout: float = 60, max_workers: int = 4) -> List[Any]:
+	"""
+	Executes steps concurrently as soon as steps they depend upon are finished.
+
+	A step exceeding its timeout, counted from when it starts running rather
+	than from when it is queued, is reported as timed out, steps depending on a
+	failed or timed out step are skipped. Abandoned steps keep their worker, so
+	a step still queued once the whole batch had time to run one after another
+	is reported as timed out too. Results are returned in step order,
+	whatever order steps finished in.
+	:param steps:
+	:param execute: callable receiving step index and step, returning step result
+	:param dependencies: for every step, indexes of earlier steps it depends upon.
+			None runs steps one after another, like before
+	:param timeouts: optional per step timeout in seconds
+	:param default_timeout: timeout for steps without their own
+	:param max_workers: steps running at the same time
+	:return: result of every step, in order
+	"""
+	count = len(steps)
+	if dependencies is None:
+		dependencies = [[index - 1] if index else [] for index in range(count)]
+	dependencies = parse_dependencies(count, dependencies)
+
+	results : List[Any] = [None] * count
+	failed = set()
+	finished = set()
+	running : Dict[Future, int] = {}
+	submitted = set()
+	# Set by the worker when a step actually starts, time spent queued for a worker doesn't count
+	started : Dict[int, float] = {}
+
+	def timeout_for(index: int) -> float:
+		if timeouts is not None and index < len(timeouts) and timeouts[index]:
+			return timeouts[index]
+		return default_timeout
+
+	def run_step(index: int):
+		started[index] = time.monotonic()
+		return execute(index, steps[index])
+
+	# Sequential run of every step fits in here, only reached when workers are stuck
+	batch_deadline = time.monotonic() + sum(timeout_for(index) for index in range(count))
+
+	def deadline_for(index: int) -> float:
+		return started[index] + timeout_for(index) if index in started else batch_deadline
+
+	pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="step")
+	try:
+		while len(finished) < count:
+			# Start every step whose dependencies are done
+			for index in range(count):
+				if index in finished or index in submitted:
+					continue
+				if not all(d in finished for d in dependencies[index]):
+					continue
+				blocked_by = [d for d in dependencies[index] if d in failed]
+				if blocked_by:
+					results[index] = f"Skipped, step {blocked_by[0] + 1} did not complete"
+					failed.add(index)
+					finished.add(index)
+					continue
+				future = pool.submit(run_step, index)
+				running[future] = index
+				submitted.add(index)
+
+			if not running:
+				continue
+
+			timeout = max(0.0, min(deadline_for(index) for index in running.values()) - time.monotonic())
+			if any(index not in started for index in running.values()):
+				# Some step is still queued, check again shortly for when it starts
+				timeout = min(timeout, QUEUED_POLL_INTERVAL)
+			done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+
+			for future in done:
+				index = running.pop(future)
+				try:
+					results[index] = future.result()
+				except Exception as e:
+					results[index] = f"Step failed : {e}"
+					failed.add(index)
+				finished.add(index)
+
+			# Running threads can't be killed, timed out steps are abandoned and their result ignored
+			now = time.monotonic()
+			for future, index in list(running.items()):
+				if now >= deadline_for(index):
+					future.cancel()
+					running.pop(future)
+					if index in started:
+						results[index] = f"Step timed out after {timeout_for(index):g}s"
+					else:
+						results[index] = "Step timed out, no worker became free"
+					failed.add(index)
+					finished.add(index)
+	finally:
+		pool.shutdown(wait=False, cancel_futures=True)
+
+	return results
@@ -0,0 +1,135 @@
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+
+# ---------------------------------------------------------------------------------------------------
+# KEYWORD RULES
+# ---------------------------------------------------------------------------------------------------
+# Checked in order, first matching rule wins. Each rule is (node name, pattern, confidence)
+WEBSITE_HINTS = r"(\.(com|org|net|io)\b|\b(website|site|web ?page)\b)"
+# Names which are sites as well as apps, "open google chrome" or "open github desktop" is an app
+BRAND_HINTS = r"\b(youtube|google|gmail|github|wikipedia|reddit|stack ?overflow)\b"
+QUERY_HINTS = r"\b(search|look up|explain|explaining|describe|answer|tell|what|who|why|how)\b"
+
+ROUTING_RULES = [
+		# Quit phrases must make up the whole step, "what is that's it about" is not a request to quit
+		("QuitConversation", re.compile(r"^(quit|exit|bye|goodbye|good bye|shut ?down|close (the )?(conversation|session)|"
+		                                r"(you can )?take a rest( now)?|that's it( for (now|today))?)[.!]*$"), 0.95),
+		("PlayVideo", re.compile(r"^(play|stream|put on)\b"), 0.95),
+		("OpenWebsite", re.compile(r"^(search|google|look up|browse)\b"), 0.9),
+		("OpenWebsite", re.compile(r"^(open|go to|visit|show)\b.*" + WEBSITE_HINTS), 0.9),
+		("OpenWebsite", re.compile(r"^(go to|visit)\b.*" + BRAND_HINTS), 0.9),
+		# Below threshold, bare brand name after "open" is left to the classifier or LLM
+		("OpenWebsite", re.compile(r"^(open|show)\b.*" + BRAND_HINTS), 0.7),
+		("LaunchApplication", re.compile(r"^(launch|start|run)\b"), 0.9),
+		("LaunchApplication", re.compile(r"^open\b"), 0.85),
+		("QueryAssistant", re.compile(r"^(answer|explain|describe|tell me|what|who|why|how|when|where|which|is|are|can|do|does|greet|applaud|thank)\b"), 0.85),
+]
+
+# Words which contradict a rule's verb, e.g. "run a google search" or "start by explaining".
+# Each one found lowers rule's confidence by CONFLICT_PENALTY, so ambiguous steps go to the LLM
+RULE_CONFLICTS = {
+		"LaunchApplication": [re.compile(WEBSITE_HINTS), re.compile(QUERY_HINTS)],
+		"PlayVideo": [re.compile(QUERY_HINTS)],
+		"QueryAssistant": [re.compile(r"\b(open|launch|play)\b")],
+}
+CONFLICT_PENALTY = 0.3
+
+# Example steps used to build nearest-centroid classifier
+CENTROID_EXAMPLES = {
+		"LaunchApplication": ["Open Visual Studio Code", "Launch pycharm", "Start the terminal", "Open calculator app"],
+		"PlayVideo": ["Play Something Just Like This on YouTube", "Play some soothing songs", "Play langgraph tutorial video"],
+		"OpenWebsite": ["Open YouTube website", "Search on Google for dotnet authentication articles", "Open github"],
+		"QueryAssistant": ["Explain how langgraph works", "Answer, what is the best way to learn machine learning", "Greet user"],
+		"QuitConversation": ["Quit", "End the conversation", "You can take a rest now"],
+}
+
+class CentroidClassifier:
+	"""
+	Tiny embedding classifier, assigns a step to the node with closest mean example embedding
+	"""
+	def __init__(self, embed: Callable[[List[str]], List[List[float]]], examples: Dict[str, List[str]] = None):
+		self.embed = embed
+		self.examples = examples or CENTROID_EXAMPLES
+		self.labels : List[str] = []
+		self.centroids : np.ndarray = None
+
+	def fit(self):
+		labels, centroids = [], []
+		for label, texts in self.examples.items():
+			vectors = np.asarray(self.embed(texts), dtype=np.float32)
+			centroid = vectors.mean(axis=0)
+			labels.append(label)
+			centroids.append(centroid / np.linalg.norm(centroid))
+		self.labels = labels
+		self.centroids = np.stack(centroids)
+
+	def classify(self, text: str) -> Tuple[str, float]:
+		"""
+		:param text:
+		:return: closest node and cosine similarity to its centroid
+		"""
+		if self.centroids is None:
+			self.fit()
+		vector = np.asarray(self.embed([text])[0], dtype=np.float32)
+		similarities = self.centroids @ (vector / np.linalg.norm(vector))
+		best = int(np.argmax(similarities))
+		return self.labels[best], float(similarities[best])
+
+class StepRouter:
+	"""
+	Cheap local routing stage in front of the LLM router.
+	Tries keyword rules first, then optional centroid classifier, and reports
+	None when neither is confident enough, so caller falls back to the LLM.
+	"""
+	def __init__(self, classifier: CentroidClassifier = None, confidence_threshold: float = 0.8,
+	             similarity_threshold: float = 0.75):
+		self.classifier = classifier
+		self.confidence_threshold = confidence_threshold
+		self.similarity_threshold = similarity_threshold
+		self.stats = {"rule_hits": 0, "embedding_hits": 0, "llm_fallbacks": 0}
+
+	@staticmethod
+	def normalize(step: str) -> str:
+		step = step.lower().strip().strip("\"'")
+		# Drop polite lead-ins, so rules can look at the leading verb
+		return re.sub(r"^((hey|hi|ok|okay|please|can you|could you|would you|buddy|gideon)[,!]?\s+)+", "", step)
+
+	def match_rules(self, step: str) -> Tuple[Optional[str], float]:
+		text = self.normalize(step)
+		for node, pattern, confidence in ROUTING_RULES:
+			if pattern.search(text):
+				conflicts = sum(1 for conflict in RULE_CONFLICTS.get(node, []) if conflict.search(text))
+				return node, confidence - conflicts * CONFLICT_PENALTY
+		return None, 0.0
+
+	def route(self, step: str) -> Optional[str]:
+		"""
+		Decides node for a step without calling the LLM, if possible
+		:param step:
+		:return: node name, or None when LLM router should decide
+		"""
+		node, confidence = self.match_rules(step)
+		if node is not None and confidence >= self.confidence_threshold:
+			self.stats["rule_hits"] += 1
+			return node
+
+		if self.classifier is not None:
+			try:
+				node, similarity = self.classifier.classify(step)
+				if similarity >= self.similarity_threshold:
+					self.stats["embedding_hits"] += 1
+					return node
+			except Exception as e:
+				print(f"Embedding router error : {e}")
+
+		self.stats["llm_fallbacks"] += 1
+		return None
+
+	def report(self) -> str:
+		total = sum(self.stats.values())
+		hits = self.stats["rule_hits"] + self.stats["embedding_hits"]
+		rate = (hits / total * 100) if total else 0.0
+		return (f"Router : {hits}/{total} steps routed locally ({rate:.0f}%) - "
+		        f"rules {self.stats['rule_hits']}, embeddings {self.stats['embedding_hits']}, "
+		        f"LLM {self.stats['llm_fallbacks']}")
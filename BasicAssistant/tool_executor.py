@@ -0,0 +1,147 @@
+import platform
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Sequence
+
+def launch_detached(args: Sequence[str], ready_timeout: float = 1.0) -> str:
+	"""
+	Starts a process without waiting for it to exit, GUI applications keep running on their own.
+	Process is watched for a short while only to catch launches which fail right away.
+	:param args: command and its arguments
+	:param ready_timeout: seconds to watch the process for an early failure
+	:return: status text for the model
+	"""
+	# stderr goes to an unnamed temp file, not a pipe: a pipe closed by us would kill
+	# a long running app with SIGPIPE the next time it logs something
+	error_file = tempfile.TemporaryFile()
+	options = {
+			"stdin": subprocess.DEVNULL,
+			"stdout": subprocess.DEVNULL,
+			"stderr": error_file,
+	}
+	if platform.system().lower() == "windows":
+		options["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+	else:
+		# Own session, so the app survives the assistant and doesn't get its Ctrl+C
+		options["start_new_session"] = True
+
+	with error_file:
+		process = subprocess.Popen(list(args), **options)
+		try:
+			return_code = process.wait(timeout=ready_timeout)
+		except subprocess.TimeoutExpired:
+			# Still running after readiness window, launch succeeded
+			return f"Started {args[0]} (pid {process.pid})"
+
+		error_file.seek(0)
+		error = error_file.read().decode(errors="replace").strip()
+	if return_code == 0:
+		# Launchers like xdg-open or 'start' hand over to another process and exit
+		return f"Started {args[0]}"
+	return f"Failed to start {args[0]} (exit code {return_code}): {error}"
+
+class ToolExecutor:
+	"""
+	Runs tools on a worker pool so a slow tool never blocks the caller longer than its timeout.
+
+	Every call gets a Future, callers wait on it with the tool's own timeout.
+	Running threads can't be killed, a timed out call is abandoned and its
+	result ignored, calls that haven't started yet are cancelled.
+	"""
+	def __init__(self, tools: Dict[str, Any], timeouts: Dict[str, float] = None,
+	             default_timeout: float = 15, max_workers: int = 4):
+		self.tools = tools
+		self.timeouts = timeouts or {}
+		self.default_timeout = default_timeout
+		self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+
+		self.pending : Dict[Future, str] = {}
+		self.lock = threading.Lock()
+		self.timed_out_count = 0
+
+	def timeout_for(self, tool_name: str) -> float:
+		return self.timeouts.get(tool_name, self.default_timeout)
+
+	def invoke(self, tool_name: str, tool_args: Dict[str, Any]) -> str:
+		"""
+		Runs a tool by name, errors are returned as text so the model can react to them
+		:param tool_name:
+		:param tool_args:
+		:return:
+		"""
+		if tool_name not in self.tools:
+			return f"Error: Unknown tool '{tool_name}'"
+		try:
+			return str(self.tools[tool_name].invoke(tool_args or {}))
+		except Exception as e:
+			return f"Tool execution error: {str(e)}"
+
+	def submit(self, tool_name: str, tool_args: Dict[str, Any]) -> Future:
+		"""
+		Starts a tool call in background
+		:param tool_name:
+		:param tool_args:
+		:return: future resolving to tool output text
+		"""
+		future = self.pool.submit(self.invoke, tool_name, tool_args)
+		with self.lock:
+			self.pending[future] = tool_name
+		future.add_done_callback(self.forget)
+		return future
+
+	def forget(self, future: Future):
+		with self.lock:
+			self.pending.pop(future, None)
+
+	def result(self, future: Future, tool_name: str, deadline: float = None) -> str:
+		"""
+		Waits for a submitted call, at most until tool's timeout
+		:param future:
+		:param tool_name:
+		:param deadline: optional monotonic time to give up at, used when several calls run together
+		:return: tool output, or timeout/cancellation notice
+		"""
+		if deadline is None:
+			deadline = time.monotonic() + self.timeout_for(tool_name)
+		try:
+			return future.result(timeout=max(0.0, deadline - time.monotonic()))
+		except FutureTimeoutError:
+			future.cancel()
+			with self.lock:
+				self.timed_out_count += 1
+			return f"Error: {tool_name} timed out after {self.timeout_for(tool_name):g}s"
+		except Exception as e:
+			# CancelledError, set by cancel_all
+			return f"Error: {tool_name} was cancelled ({type(e).__name__})"
+
+	def run(self, tool_name: str, tool_args: Dict[str, Any]) -> str:
+		return self.result(self.submit(tool_name, tool_args), tool_name)
+
+	def run_all(self, calls: Sequence[Dict[str, Any]]) -> List[str]:
+		"""
+		Runs several tool calls concurrently, each one bounded by its own timeout
+		:param calls: dicts with "name" and "args", as in AIMessage.tool_calls
+		:return: outputs in call order
+		"""
+		started = time.monotonic()
+		futures = [self.submit(call["name"], call["args"]) for call in calls]
+		return [
+				self.result(future, call["name"], started + self.timeout_for(call["name"]))
+				for call, future in zip(calls, futures)
+		]
+
+	def cancel_all(self) -> int:
+		"""
+		Cancels every call which hasn't started yet, used when user interrupts the turn
+		:return: number of cancelled calls
+		"""
+		with self.lock:
+			pending = list(self.pending)
+		return sum(1 for future in pending if future.cancel())
+
+	def shutdown(self):
+		self.cancel_all()
+		self.pool.shutdown(wait=False, cancel_futures=True)
@@ -1,8 +1,11 @@
 import sounddevice as sd
 import numpy as np
-import queue
 import threading
-from faster_whisper import WhisperModel
+import time
+
+# FinalAssistant modules are imported as a package, run this from the repo root: python -m BasicAssistant.transcriber
+from FinalAssistant.ring_buffer import AudioRingBuffer
+from FinalAssistant.model_registry import acquire_whisper
 
 # settings
 samplerate = 16000
@@ -13,20 +16,23 @@ channels = 1
 frames_per_block = int(samplerate * block_duration)
 frames_per_chunk = int(samplerate * chunk_duration)
 
-audio_queue = queue.Queue()
-audio_buffer = []
+# Callback writes into preallocated ring buffer, frames past a chunk boundary
+# stay in the buffer for the next chunk instead of being dropped
+audio_ring = AudioRingBuffer(frames_per_chunk * 4)
+audio_chunk = np.zeros(frames_per_chunk, dtype=np.float32)
 
-model = WhisperModel("small.en", device="cpu", compute_type="int8")
+model = acquire_whisper("small.en", device="cpu", compute_type="int8")
 
 def audio_callback(indata, frames, time, status):
 	if status:
 		print(status)
-	audio_queue.put(indata.copy())
+	audio_ring.write(indata[:, 0])
 
 def recorder():
 	with sd.InputStream(
 			samplerate=samplerate,
 			channels=channels,
+			dtype="float32",
 			callback=audio_callback,
 			blocksize=frames_per_block):
 		print("Listening.... Press Ctrl+C to stop")
@@ -34,27 +40,25 @@ def recorder():
 			sd.sleep(100)
 
 def transcriber():
-	global audio_buffer
 	while True:
-		block = audio_queue.get()
-		audio_buffer.append(block)
+		if audio_ring.readable() < frames_per_chunk:
+			time.sleep(block_duration / 2)
+			continue
 
-		total_frames = sum(len(b) for b in audio_buffer)
-		if total_frames >= frames_per_chunk:
-			audio_data = np.concatenate(audio_buffer)[:frames_per_chunk]
-			audio_buffer = [] #Clears the audio buffer
+		audio_ring.read_into(audio_chunk)
 
-			audio_data = audio_data.flatten().astype(np.float32)
+		if audio_ring.overflow_count:
+			print(f"Input overflow, dropped {audio_ring.overflow_frames} frames so far")
 
-			# Transcription without timestamps
-			segments, _ = model.transcribe(
-					audio_data,
-					language="en",
-					beam_size=1 #Max Speed
-			)
+		# Transcription without timestamps
+		segments, _ = model.transcribe(
+				audio_chunk,
+				language="en",
+				beam_size=1 #Max Speed
+		)
 
-			for segment in segments:
-				print(segment.text) #Just printing, no timestamps
+		for segment in segments:
+			print(segment.text) #Just printing, no timestamps
 
 # start threads for recording
 threading.Thread(target=recorder, daemon=True).start()
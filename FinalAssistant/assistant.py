@@ -2,11 +2,17 @@ from typing import TypedDict, List
 from langgraph.graph import StateGraph, START, END
 from langchain_ollama.chat_models import ChatOllama
 from langgraph.graph.state import CompiledStateGraph
+from langchain_core.messages import AIMessage
 import re
+import threading
+import requests
 
 from helper_tools import play_video, launch_application, search_web
 from listener import Listener
+from conversation_history import ConversationHistory
 from speaker import Speaker
+from session import SessionOrchestrator
+from startup import StartupManager
 import torch
 
 SYSTEM_PROMPT = """You are a helpful personal assistant.
@@ -21,6 +27,13 @@ STRICT RULES:
 NOTE : It is not required to call a tool for every task. Use tools only if required or specifically asked
 """
 
+OLLAMA_BASE_URL = "http://localhost:11434"
+OLLAMA_KEEP_ALIVE = "30m"
+
+SUMMARY_PROMPT = """Update the summary of a conversation between user and assistant.
+Keep names, preferences, requests and facts that may be needed later. Keep it under 120 words.
+Reply with the summary only."""
+
 class AgentState(TypedDict):
     messages: List[str]
 
@@ -28,11 +41,15 @@ class Assistant:
     def __init__(self):
         self.assistant : CompiledStateGraph = None
         self.model : ChatOllama = None
+        self.summary_model : ChatOllama = None
         self.is_ready = False
         self.available_tools : List = [play_video, launch_application, search_web]
-        self.previous_conversations = [
-                ("system", SYSTEM_PROMPT)
-            ]
+        # Only recent turns within token budget are re-sent, older ones get summarized
+        self.history = ConversationHistory(
+                SYSTEM_PROMPT,
+                token_budget=2048,
+                summarizer=self.summarize_conversation
+        )
         self.emoji_pattern = re.compile("["
                                    u"\U0001F600-\U0001F64F"  # emoticons
                                    u"\U0001F300-\U0001F5FF"  # symbols & pictographs
@@ -40,35 +57,94 @@ class Assistant:
                                    u"\U0001F1E0-\U0001F1FF"  # flags (iOS)
                                    "]+", flags=re.UNICODE)
 
+        # Speak sentences as soon as model streams them instead of waiting for full completion
+        self.stream_responses = True
+        self.sentence_end_pattern = re.compile(r"[.!?;:](?=\s)|\n")
+        # Set by barge-in to abandon in-flight generation
+        self.cancel_event = threading.Event()
+        # Session orchestrator turns this off, so next turn can start while reply is still playing
+        self.wait_for_speech = True
+
+        self.model_name = "qwen3:4b"
         self.listener = Listener()
         self.speaker = Speaker()
-        self.initialize_llm(model_name="qwen3:4b")
+        self.initialize_llm(model_name=self.model_name)
         self.setup_assistant_workflow()
+
+        # Whisper, TTS and Ollama weights load in parallel, instead of one after another
+        self.startup = StartupManager()
+        self.startup.add("whisper", self.listener.warm_up)
+        self.startup.add("tts", self.speaker.warm_up)
+        self.startup.add("ollama", self.warm_up_llm)
+        self.startup.start()
+        self.startup.wait_until_ready()
+        self.startup.report()
         # self.speaker.speak("I am ready to go!!")
 
     def initialize_llm(self, model_name: str = "qwen3:4b"):
         llm = ChatOllama(
-                model=model_name
+                model=model_name,
+                base_url=OLLAMA_BASE_URL,
+                keep_alive=OLLAMA_KEEP_ALIVE
         )
         self.model = llm.bind_tools(self.available_tools)
+        self.summary_model = ChatOllama(
+                model=model_name,
+                base_url=OLLAMA_BASE_URL,
+                keep_alive=OLLAMA_KEEP_ALIVE,
+                reasoning=False
+        )
+
+    def warm_up_llm(self):
+        """
+        Asks Ollama to load model weights without generating anything,
+        and to keep them resident between turns
+        :return:
+        """
+        response = requests.post(
+                f"{OLLAMA_BASE_URL}/api/generate",
+                json={"model": self.model_name, "keep_alive": OLLAMA_KEEP_ALIVE},
+                timeout=300
+        )
+        response.raise_for_status()
+
+    def summarize_conversation(self, summary, messages):
+        """
+        Folds older messages into running summary, runs off the critical path
+        :param summary: current summary
+        :param messages: messages dropped out of history window
+        :return: updated summary
+        """
+        transcript = "\n".join(f"{role}: {content}" for role, content in messages)
+        response = self.summary_model.invoke([
+                ("system", SUMMARY_PROMPT),
+                ("user", f"Current summary:\n{summary or 'None'}\n\nNew messages:\n{transcript}")
+        ])
+        return self.parse_response(response.content).strip()
 
     def process(self, state: AgentState):
         messages = state["messages"]
-        response = self.model.invoke(messages)
+        if self.stream_responses:
+            response = self.stream_and_speak(messages)
+        else:
+            response = self.model.invoke(messages)
 
         print(response.pretty_print())
 
-        self.previous_conversations.append(
-                ("assistant", response.content)
-        )
+        # Think block is not needed in later turns, keep only the visible answer
+        self.history.append("assistant", self.parse_response(response.content).strip())
 
-        speaker_sentence = self.parse_response(response.content)
+        if not self.stream_responses:
+            speaker_sentence = self.parse_response(response.content)
 
-        if speaker_sentence is not None or speaker_sentence!="None":
-            self.speak(speaker_sentence)
-        else:
-            print("Invalid Response Content")
-            print(response)
+            if speaker_sentence is not None or speaker_sentence!="None":
+                self.speak(speaker_sentence)
+            else:
+                print("Invalid Response Content")
+                print(response)
+
+        # Reply is done, older turns can now be summarized without competing with it for the model
+        self.history.summarize_in_background()
 
         return {
                 "messages": messages + [("assistant", response.content)]
@@ -89,12 +165,11 @@ class Assistant:
         self.is_ready = True
 
     def invoke_workflow(self, user_query):
-        self.previous_conversations.append(
-                ("user", user_query)
-        )
+        self.history.append("user", user_query)
         initial_agent_state = {
-                "messages": self.previous_conversations
+                "messages": self.history.build()
         }
+        print(f"Tokens sent this turn : {self.history.last_tokens_sent} (session total : {self.history.total_tokens_sent})")
 
         final_state = self.assistant.invoke(initial_agent_state)
 
@@ -111,11 +186,84 @@ class Assistant:
         try:
             print("Starting...")
             rec_text = self.listen()
+            if not rec_text.strip():
+                return
             self.invoke_workflow(rec_text)
         except Exception as e:
             print(e)
             self.speaker.speak("Error Encountered")
 
+    def stream_and_speak(self, messages):
+        """
+        Streams model response and hands every completed sentence to the speaker,
+        while the rest of the answer is still being generated.
+        Tokens of the <think> block are dropped until </think> arrives.
+        :param messages:
+        :return: complete response message
+        """
+        response = None
+        raw_text = ""
+        consumed = 0
+        pending = ""
+
+        for chunk in self.model.stream(messages):
+            if self.cancel_event.is_set():
+                print("Generation cancelled")
+                return response if response is not None else AIMessage(content="")
+            response = chunk if response is None else response + chunk
+            raw_text += chunk.content
+
+            answer = self.visible_answer(raw_text)
+            if answer is None:
+                continue
+
+            pending += self.emoji_pattern.sub(r'', answer[consumed:])
+            consumed = len(answer)
+
+            sentences, pending = self.pop_complete_sentences(pending)
+            for sentence in sentences:
+                self.speaker.enqueue(sentence)
+
+        answer = self.visible_answer(raw_text)
+        if answer is not None:
+            pending += self.emoji_pattern.sub(r'', answer[consumed:])
+        for sentence in self.speaker.split_sentences(pending):
+            self.speaker.enqueue(sentence)
+
+        if self.wait_for_speech:
+            self.speaker.wait_until_done()
+        return response if response is not None else AIMessage(content="")
+
+    @staticmethod
+    def visible_answer(raw_text):
+        """
+        Part of streamed text which should be spoken
+        :param raw_text: text streamed so far
+        :return: text after the think block, or None while model is still thinking
+        """
+        stripped = raw_text.lstrip()
+        if stripped.startswith("<think>"):
+            if "</think>" not in raw_text:
+                return None
+            return raw_text.split("</think>", 1)[1]
+        if "<think>".startswith(stripped):
+            # Not enough text yet to know if a think block is starting
+            return None
+        return raw_text
+
+    def pop_complete_sentences(self, text):
+        """
+        Splits off every complete sentence from streamed text
+        :param text:
+        :return: list of complete sentences and the unfinished remainder
+        """
+        last_end = None
+        for last_end in self.sentence_end_pattern.finditer(text):
+            pass
+        if last_end is None:
+            return [], text
+        return self.speaker.split_sentences(text[:last_end.end()]), text[last_end.end():]
+
     def parse_response(self, response):
         response = response.split('</think>')[-1]
 
@@ -128,8 +276,7 @@ if __name__=="__main__":
         print(torch.cuda.memory_summary())
         torch.cuda.empty_cache()
         gideon = Assistant()
-        while True:
-            gideon.start_session()
+        SessionOrchestrator(gideon).run()
     except Exception as e:
         print(e)
         print(torch.cuda.memory_summary())
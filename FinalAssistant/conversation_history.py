@@ -0,0 +1,109 @@
+import threading
+from typing import Callable, List, Tuple
+
+# (role, content) pair as accepted by ChatOllama
+Message = Tuple[str, str]
+
+SUMMARY_PREFIX = "Summary of earlier conversation with user:\n"
+
+class ConversationHistory:
+	"""
+	Keeps conversation sent to the model within a token budget.
+
+	System prompt is always sent first and unchanged, most recent messages
+	are sent verbatim as long as they fit the budget. Messages which fall out
+	of the window can be folded into a rolling summary by a summarizer. It is
+	started by the caller once a reply is done, runs on a background thread,
+	and only after summary_batch messages have left the window, so it doesn't
+	compete with reply generation for the model.
+	"""
+	def __init__(self, system_prompt: str, token_budget: int = 2048,
+	             summarizer: Callable[[str, List[Message]], str] = None, summary_batch: int = 4):
+		self.system_prompt = system_prompt
+		self.token_budget = token_budget
+		self.summarizer = summarizer
+		self.summary_batch = summary_batch
+
+		self.messages : List[Message] = []
+		self.summary = ""
+		self.summarized_until = 0       # messages before this index are part of summary
+		self.window_start = 0           # oldest message sent verbatim by last build()
+		self.summary_thread : threading.Thread = None
+		self.lock = threading.Lock()
+
+		self.tokens_per_turn : List[int] = []
+
+	@staticmethod
+	def estimate_tokens(text: str) -> int:
+		"""
+		Rough token count, about 4 characters per token for english text
+		:param text:
+		:return:
+		"""
+		return len(text) // 4 + 1
+
+	@property
+	def total_tokens_sent(self) -> int:
+		return sum(self.tokens_per_turn)
+
+	@property
+	def last_tokens_sent(self) -> int:
+		return self.tokens_per_turn[-1] if self.tokens_per_turn else 0
+
+	def append(self, role: str, content: str):
+		with self.lock:
+			self.messages.append((role, content))
+
+	def build(self) -> List[Message]:
+		"""
+		Builds message list for next model call and records its size
+		:return:
+		"""
+		with self.lock:
+			prefix = [("system", self.system_prompt)]
+			if self.summary:
+				prefix.append(("system", SUMMARY_PREFIX + self.summary))
+			used = sum(self.estimate_tokens(content) for _, content in prefix)
+
+			# Walk back from newest message while budget allows, newest one is always kept
+			window_start = len(self.messages)
+			for index in range(len(self.messages) - 1, -1, -1):
+				cost = self.estimate_tokens(self.messages[index][1])
+				if used + cost > self.token_budget and window_start < len(self.messages):
+					break
+				used += cost
+				window_start = index
+
+			messages = prefix + self.messages[window_start:]
+			self.tokens_per_turn.append(used)
+			self.window_start = window_start
+
+		return messages
+
+	def summarize_in_background(self):
+		"""
+		Folds messages which are no longer sent into summary, call after reply has been generated
+		:return:
+		"""
+		window_start = self.window_start
+		if self.summarizer is None or window_start - self.summarized_until < self.summary_batch:
+			return
+		if self.summary_thread is not None and self.summary_thread.is_alive():
+			return
+
+		with self.lock:
+			dropped = self.messages[self.summarized_until:window_start]
+			previous_summary = self.summary
+
+		def summarize():
+			try:
+				summary = self.summarizer(previous_summary, dropped)
+			except Exception as e:
+				print("Summary error:", e)
+				return
+			with self.lock:
+				self.summary = summary
+				self.summarized_until = window_start
+
+		self.summary_thread = threading.Thread(target=summarize, daemon=True)
+		self.summary_thread.start()
@@ -1,7 +1,25 @@
 from langchain_core.tools import tool
 from pywhatkit import playonyt, search
+from concurrent.futures import ThreadPoolExecutor, Future
 import subprocess
 
+# pywhatkit calls open a browser and can take seconds, they run here so voice loop never waits on them
+tool_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="tool")
+
+def run_in_background(function, *args) -> Future:
+	"""
+	Runs a slow tool action off the calling thread, errors are printed instead of raised
+	:param function:
+	:param args:
+	:return: future of the action
+	"""
+	def run():
+		try:
+			return function(*args)
+		except Exception as e:
+			print(f"{function.__name__} failed : {e}")
+	return tool_pool.submit(run)
+
 @tool()
 def play_video(request_text: str):
 	"""
@@ -10,18 +28,39 @@ def play_video(request_text: str):
 	:return:
 	"""
 	print("Playing....", request_text)
-	playonyt(request_text)
+	run_in_background(playonyt, request_text)
+	return f"Started playing {request_text} on YouTube"
+
+# Only these applications may be started, command given by the model is never executed as is
+ALLOWED_APPS = {
+		"gedit": "gedit",
+		"firefox": "firefox",
+		"calculator": "gnome-calculator",
+}
+
+def start_detached(executable: str):
+	# Own session and no pipes, app keeps running after assistant exits
+	subprocess.Popen(
+			[executable],
+			stdin=subprocess.DEVNULL,
+			stdout=subprocess.DEVNULL,
+			stderr=subprocess.DEVNULL,
+			start_new_session=True
+	)
 
 @tool()
 def launch_application(command: str):
 	"""
-	Executes given command with subprocess module
-	to launch an application
-	:param command: command required to open an application on ubuntu using terminal
+	Launches one of the allowed applications
+	:param command: name of application to open (gedit, firefox, calculator)
 	:return:
 	"""
 	print("Launching ..... ", command)
-	# subprocess.Popen()
+	app_name = command.strip().lower()
+	if app_name not in ALLOWED_APPS:
+		return f"App '{command}' is not allowed."
+	run_in_background(start_detached, ALLOWED_APPS[app_name])
+	return f"Launching {app_name}"
 
 @tool()
 def search_web(search_text: str):
@@ -31,4 +70,5 @@ def search_web(search_text: str):
 	:return:
 	"""
 	print("Searching for .....", search_text)
-	search(search_text)
\ No newline at end of file
+	run_in_background(search, search_text)
+	return f"Started web search for {search_text}"
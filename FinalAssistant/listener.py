@@ -1,12 +1,21 @@
 import sounddevice as sd
-import queue
+import numpy as np
+import time
 from faster_whisper import WhisperModel
 
+import model_registry
+from ring_buffer import AudioRingBuffer
+from streaming_transcriber import StreamingTranscriber
+
 class Listener:
 	def __init__(self):
-		self.model : WhisperModel = WhisperModel("small.en", device="cpu", compute_type="int8")
+		# Loaded by initialize_whisper, either on first listen or during startup warm-up
+		self.model : WhisperModel = None
+		self.whisper_model_name = "small.en"
+		self.whisper_device = "cpu"
+		self.whisper_compute_type = "int8"
 		self.samplerate = 16000
-		self.block_duration = 0.5   #seconds
+		self.block_duration = 0.1   #seconds
 		self.chunk_duration = 2     #seconds
 		self.channels = 1
 		self.rec_duration = 5
@@ -14,11 +23,58 @@ class Listener:
 		self.frames_per_block = int(self.samplerate * self.block_duration)
 		self.frames_per_chunk = int(self.samplerate * self.chunk_duration)
 
-		self.audio_queue = queue.Queue()
-		self.audio_buffer = []
+		# Voice activity detection (VAD) endpointing
+		# "vad" stops recording on trailing silence, "fixed" records for rec_duration seconds
+		self.capture_mode = "vad"
+		self.energy_threshold = 0.01        # minimum RMS treated as speech
+		self.noise_multiplier = 3.0         # speech must be this much louder than measured noise floor
+		self.calibration_duration = 0.3     #seconds of ambient noise measured before listening
+		self.pre_roll_duration = 0.3        #seconds kept from before speech onset
+		self.hangover_duration = 0.7        #seconds of trailing silence which ends an utterance
+		self.start_timeout = 8              #seconds to wait for speech to begin
+		self.max_rec_duration = 15          #seconds, hard cap on utterance length
+
+		# "streaming" transcribes while recording, "batch" transcribes after recording ends
+		self.transcription_mode = "streaming"
+		self.stream_step_duration = 0.5     #seconds of new audio between streaming passes
+
+		# Barge-in support, both are optional callables set by session orchestrator
+		self.on_speech_start = None         # called as soon as speech onset is detected
+		self.playback_active = None         # returns True while assistant is talking
+		self.barge_in_multiplier = 2.0      # raises threshold during playback, so echo is not taken as speech
+		# perf_counter() when recording of last utterance ended, before it was transcribed
+		self.speech_ended_at : float = None
+
+		# Callback writes straight into preallocated buffers, nothing is allocated per block
+		self.ring_buffer = AudioRingBuffer(self.samplerate * 2)
+		capture_duration = self.calibration_duration + self.start_timeout + self.max_rec_duration + 2 * self.block_duration
+		self.capture_buffer = np.zeros(int(capture_duration * self.samplerate), dtype=np.float32)
 
 	def initialize_whisper(self):
-		self.model = WhisperModel("small.en", device="cpu", compute_type="int8")
+		self.model = model_registry.acquire_whisper(
+				self.whisper_model_name,
+				device=self.whisper_device,
+				compute_type=self.whisper_compute_type
+		)
+
+	def cleanup(self):
+		"""
+		Hands Whisper model back to registry, it stays loaded for other users
+		:return:
+		"""
+		if self.model is not None:
+			model_registry.release(self.model)
+			self.model = None
+
+	def warm_up(self):
+		"""
+		Loads Whisper and runs one dummy transcription, so first real one isn't slower
+		:return:
+		"""
+		if self.model is None:
+			self.initialize_whisper()
+		segments, _ = self.model.transcribe(np.zeros(self.samplerate, dtype=np.float32), language="en", beam_size=1)
+		list(segments)
 
 	def transcriber(self, audio_data):
 		segments, _ = self.model.transcribe(
@@ -34,7 +90,7 @@ class Listener:
 			sentence += segment.text
 		return sentence
 
-	def record_speech(self):
+	def record_fixed_duration(self):
 		sd.stop()
 		try:
 			wav = sd.rec(self.rec_duration * self.samplerate, self.samplerate, 1)
@@ -42,15 +98,159 @@ class Listener:
 			print(e)
 			return None
 		sd.wait()
+		self.speech_ended_at = time.perf_counter()
 		return wav.squeeze()
 
+	def audio_callback(self, indata, frames, time, status):
+		"""
+		Called by sounddevice on its own thread for every captured block
+		:param indata: captured block of shape (frames, channels)
+		:param frames:
+		:param time:
+		:param status:
+		:return:
+		"""
+		if status:
+			print(status)
+		self.ring_buffer.write(indata[:, 0])
+
+	def blocks_for(self, duration: float) -> int:
+		"""
+		Converts a duration in seconds into a count of capture blocks
+		:param duration: seconds
+		:return:
+		"""
+		return max(1, int(round(duration / self.block_duration)))
+
+	def record_until_silence(self, on_block=None):
+		"""
+		Records from microphone until trailing silence is detected.
+		Audio before speech onset is kept as pre-roll, so the first
+		syllable is not clipped, and recording only stops after
+		hangover_duration seconds of continuous silence.
+		:param on_block: optional callable receiving every block added to the utterance
+		:return: view of recorded utterance in capture_buffer (valid until next recording)
+				or None if no speech was heard
+		"""
+		self.ring_buffer.reset()
+
+		block = self.frames_per_block
+		calibration_blocks = self.blocks_for(self.calibration_duration)
+		pre_roll_frames = self.blocks_for(self.pre_roll_duration) * block
+		hangover_blocks = self.blocks_for(self.hangover_duration)
+		start_timeout_blocks = self.blocks_for(self.start_timeout)
+		max_blocks = self.blocks_for(self.max_rec_duration)
+		capacity = len(self.capture_buffer) - len(self.capture_buffer) % block
+
+		noise_levels = []
+		threshold = self.energy_threshold
+		position = 0
+		speech_start = None
+		silent_blocks = 0
+		waited_blocks = 0
+
+		try:
+			stream = sd.InputStream(
+					samplerate=self.samplerate,
+					channels=self.channels,
+					dtype="float32",
+					callback=self.audio_callback,
+					blocksize=self.frames_per_block)
+		except Exception as e:
+			print(e)
+			return None
+
+		with stream:
+			while position < capacity:
+				if self.ring_buffer.readable() < block:
+					time.sleep(self.block_duration / 4)
+					continue
+
+				current = self.capture_buffer[position:position + block]
+				self.ring_buffer.read_into(current)
+				position += block
+				level = float(np.sqrt(np.mean(np.square(current))))
+
+				# Measure ambient noise to adapt threshold to the room
+				if len(noise_levels) < calibration_blocks:
+					noise_levels.append(level)
+					if len(noise_levels) == calibration_blocks:
+						threshold = max(self.energy_threshold, float(np.median(noise_levels)) * self.noise_multiplier)
+					continue
+
+				if self.playback_active is not None and self.playback_active():
+					is_speech = level >= threshold * self.barge_in_multiplier
+				else:
+					is_speech = level >= threshold
+
+				if speech_start is None:
+					if is_speech:
+						speech_start = max(0, position - block - pre_roll_frames)
+						if self.on_speech_start is not None:
+							self.on_speech_start()
+						if on_block is not None:
+							on_block(self.capture_buffer[speech_start:position])
+						continue
+					waited_blocks += 1
+					if waited_blocks >= start_timeout_blocks:
+						return None
+					continue
+
+				if on_block is not None:
+					on_block(current)
+				silent_blocks = 0 if is_speech else silent_blocks + 1
+
+				if silent_blocks >= hangover_blocks or position - speech_start >= max_blocks * block:
+					break
+
+		if speech_start is not None:
+			self.speech_ended_at = time.perf_counter()
+		if self.ring_buffer.overflow_count:
+			print(f"Input overflow, dropped {self.ring_buffer.overflow_frames} frames")
+		if speech_start is None:
+			return None
+		return self.capture_buffer[speech_start:position]
+
+	def record_speech(self):
+		if self.capture_mode == "fixed":
+			return self.record_fixed_duration()
+		return self.record_until_silence()
+
+	def listen_streaming(self) -> str:
+		"""
+		Records until end of speech while transcribing in parallel,
+		so only the last un-agreed words are left to decode once user stops talking
+		:return:
+		"""
+		print("Listening....")
+		streamer = StreamingTranscriber(
+				self.model,
+				samplerate=self.samplerate,
+				max_duration=self.max_rec_duration + self.pre_roll_duration + self.block_duration,
+				step_duration=self.stream_step_duration
+		)
+		streamer.start()
+		audio = self.record_until_silence(on_block=streamer.append)
+		print("Recording Finished...")
+		if audio is None:
+			streamer.stop()
+			return ""
+		transcribed_text = streamer.finish()
+
+		print(transcribed_text)
+		return transcribed_text
+
 	def listen(self) -> str:
+		self.speech_ended_at = None
 		if self.model is None:
 			self.initialize_whisper()
+		if self.transcription_mode == "streaming" and self.capture_mode == "vad":
+			return self.listen_streaming()
 		print("Listening....")
 		audio = self.record_speech()
-		sd.wait()
 		print("Recording Finished...")
+		if audio is None:
+			return ""
 		transcribed_text = self.transcriber(audio)
 
 		print(transcribed_text)
@@ -0,0 +1,163 @@
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Tuple
+
+# (kind, name, device, compute_type) identifying one loaded model
+ModelKey = Tuple[str, str, str, str]
+
+class ModelEntry:
+	def __init__(self, model: Any):
+		self.model = model
+		self.ref_count = 0
+		self.last_used = time.monotonic()
+
+class ModelRegistry:
+	"""
+	Process wide cache of loaded Whisper and TTS models.
+
+	Models are keyed by name, device and compute type, so every entry point
+	asking for same configuration shares one loaded copy. Each acquire()
+	must be paired with a release(). Models nobody holds can be unloaded
+	explicitly or evicted after being idle for a while.
+	"""
+	def __init__(self):
+		self.entries : Dict[ModelKey, ModelEntry] = {}
+		self.lock = threading.Lock()
+		self.loading_locks : Dict[ModelKey, threading.Lock] = {}
+		self.reaper : threading.Thread = None
+
+	def acquire(self, key: ModelKey, loader: Callable[[], Any]) -> Any:
+		"""
+		Returns cached model for key, loading it with loader on first use
+		:param key:
+		:param loader: callable creating the model
+		:return:
+		"""
+		with self.lock:
+			loading_lock = self.loading_locks.setdefault(key, threading.Lock())
+
+		# Only one thread loads a given model, others wait for it instead of loading it again
+		with loading_lock:
+			# Lookup and ref count change in one hold, so the reaper can't unload entry in between
+			with self.lock:
+				entry = self.entries.get(key)
+				if entry is not None:
+					entry.ref_count += 1
+					entry.last_used = time.monotonic()
+					return entry.model
+
+			print(f"Loading {key[0]} model {key[1]} ({key[2]}, {key[3]})")
+			entry = ModelEntry(loader())
+			entry.ref_count = 1
+			with self.lock:
+				self.entries[key] = entry
+			return entry.model
+
+	def release(self, model: Any):
+		"""
+		Marks one holder of model as done with it, model stays cached
+		:param model:
+		:return:
+		"""
+		with self.lock:
+			for entry in self.entries.values():
+				if entry.model is model:
+					entry.ref_count = max(0, entry.ref_count - 1)
+					entry.last_used = time.monotonic()
+					return
+
+	def unload(self, key: ModelKey, force: bool = False) -> bool:
+		"""
+		Drops model from cache so its memory can be freed
+		:param key:
+		:param force: unload even if model is still held by someone
+		:return: True if model was unloaded
+		"""
+		with self.lock:
+			entry = self.entries.get(key)
+			if entry is None or (entry.ref_count > 0 and not force):
+				return False
+			del self.entries[key]
+
+		print(f"Unloaded {key[0]} model {key[1]} ({key[2]}, {key[3]})")
+		if "torch" in sys.modules:
+			torch = sys.modules["torch"]
+			if torch.cuda.is_available():
+				torch.cuda.empty_cache()
+		return True
+
+	def evict_idle(self, max_idle: float):
+		"""
+		Unloads every unused model which has been idle for longer than max_idle seconds
+		:param max_idle:
+		:return:
+		"""
+		now = time.monotonic()
+		with self.lock:
+			idle = [key for key, entry in self.entries.items()
+			        if entry.ref_count == 0 and now - entry.last_used > max_idle]
+		for key in idle:
+			self.unload(key)
+
+	def start_reaper(self, max_idle: float = 600, interval: float = 60):
+		"""
+		Periodically evicts idle models on a background thread
+		:param max_idle: seconds a model may stay unused
+		:param interval: seconds between checks
+		:return:
+		"""
+		if self.reaper is not None and self.reaper.is_alive():
+			return
+
+		def reap():
+			while True:
+				time.sleep(interval)
+				self.evict_idle(max_idle)
+
+		self.reaper = threading.Thread(target=reap, daemon=True)
+		self.reaper.start()
+
+	def loaded(self) -> Dict[ModelKey, int]:
+		"""
+		:return: reference count of every loaded model
+		"""
+		with self.lock:
+			return {key: entry.ref_count for key, entry in self.entries.items()}
+
+registry = ModelRegistry()
+
+def acquire_whisper(name: str = "small.en", device: str = "cpu", compute_type: str = "int8"):
+	"""
+	Shared faster-whisper model for given configuration
+	:param name:
+	:param device:
+	:param compute_type:
+	:return:
+	"""
+	def load():
+		from faster_whisper import WhisperModel
+		return WhisperModel(name, device=device, compute_type=compute_type)
+
+	return registry.acquire(("whisper", name, device, compute_type), load)
+
+def acquire_tts(name: str = "tts_models/en/ek1/tacotron2", device: str = None):
+	"""
+	Shared Coqui TTS model, placed on cuda when available unless device is given
+	:param name:
+	:param device:
+	:return:
+	"""
+	import torch
+	device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+
+	def load():
+		os.environ["TORCH_FORCE_NO_WEIGHTS_ONLY_LOAD"] = "1"
+		from TTS.api import TTS
+		return TTS(name).to(device)
+
+	return registry.acquire(("tts", name, device, "default"), load)
+
+def release(model: Any):
+	registry.release(model)
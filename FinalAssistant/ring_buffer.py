@@ -0,0 +1,107 @@
+import numpy as np
+from typing import Tuple
+
+class AudioRingBuffer:
+	"""
+	Preallocated float32 circular buffer for mono microphone audio.
+
+	Meant for single producer / single consumer handoff without locks:
+	the sounddevice callback is the only one calling write(), which only
+	moves write_index, and the reader thread is the only one moving
+	read_index. Both indexes grow monotonically, their difference is the
+	number of unread frames. Indexes are published only after samples are
+	copied, so reader never sees a half written block.
+	"""
+	def __init__(self, capacity: int):
+		self.capacity = capacity
+		self.data = np.zeros(capacity, dtype=np.float32)
+		self.write_index = 0
+		self.read_index = 0
+		self.overflow_frames = 0
+		self.overflow_count = 0
+
+	def reset(self):
+		"""
+		Drops all unread audio, only call while producer is stopped
+		:return:
+		"""
+		self.write_index = 0
+		self.read_index = 0
+		self.overflow_frames = 0
+		self.overflow_count = 0
+
+	def readable(self) -> int:
+		return self.write_index - self.read_index
+
+	def writable(self) -> int:
+		return self.capacity - self.readable()
+
+	def write(self, samples: np.ndarray) -> int:
+		"""
+		Copies samples into buffer, called from the audio callback.
+		Frames which don't fit are dropped and counted as overflow.
+		:param samples: 1-D float32 samples, a column view of indata works without copying
+		:return: number of frames written
+		"""
+		frames = min(len(samples), self.writable())
+		if frames < len(samples):
+			self.overflow_frames += len(samples) - frames
+			self.overflow_count += 1
+
+		start = self.write_index % self.capacity
+		first = min(frames, self.capacity - start)
+		self.data[start:start + first] = samples[:first]
+		self.data[:frames - first] = samples[first:frames]
+
+		self.write_index += frames
+		return frames
+
+	def views(self, start_index: int, frames: int) -> Tuple[np.ndarray, np.ndarray]:
+		"""
+		Wrap-aware views over frames starting at an absolute index
+		:param start_index: absolute frame index
+		:param frames:
+		:return: two views, second one is empty unless the range wraps around
+		"""
+		start = start_index % self.capacity
+		first = min(frames, self.capacity - start)
+		return self.data[start:start + first], self.data[:frames - first]
+
+	def peek(self, frames: int = None) -> Tuple[np.ndarray, np.ndarray]:
+		"""
+		Views over oldest unread frames, without consuming them
+		:param frames: defaults to everything readable
+		:return:
+		"""
+		available = self.readable()
+		frames = available if frames is None else min(frames, available)
+		return self.views(self.read_index, frames)
+
+	def advance(self, frames: int):
+		self.read_index += min(frames, self.readable())
+
+	def read_into(self, out: np.ndarray) -> int:
+		"""
+		Moves oldest unread frames into a preallocated array
+		:param out: destination, at most len(out) frames are read
+		:return: number of frames read
+		"""
+		first, second = self.peek(len(out))
+		out[:len(first)] = first
+		out[len(first):len(first) + len(second)] = second
+		frames = len(first) + len(second)
+		self.advance(frames)
+		return frames
+
+	def latest_into(self, out: np.ndarray) -> int:
+		"""
+		Copies most recently written frames regardless of read position,
+		used by visualizers which only care about the newest audio
+		:param out: destination, filled with up to len(out) newest frames
+		:return: number of frames copied
+		"""
+		frames = min(len(out), self.write_index, self.capacity)
+		first, second = self.views(self.write_index - frames, frames)
+		out[:len(first)] = first
+		out[len(first):frames] = second
+		return frames
@@ -0,0 +1,132 @@
+import queue
+import threading
+import time
+from typing import List
+
+import model_registry
+
+# Models nobody holds are unloaded after this many seconds of idling
+MODEL_MAX_IDLE = 600
+
+class SessionOrchestrator:
+	"""
+	Runs listening, thinking and speaking as concurrent stages.
+
+	Capture stage keeps the microphone open and queues every utterance,
+	think stage streams the reply into the speaker queue, and speaker's own
+	workers synthesize and play it. If user starts talking while Gideon is
+	answering, playback and the in-flight generation are cancelled (barge-in).
+	"""
+	def __init__(self, assistant):
+		self.assistant = assistant
+		self.listener = assistant.listener
+		self.speaker = assistant.speaker
+
+		# (text, perf_counter() at end of speech) for every utterance
+		self.utterance_queue = queue.Queue()
+		self.stop_event = threading.Event()
+		self.generating = threading.Event()
+
+		# End of speech of the turn being answered, set by think stage only
+		self.turn_started : float = None
+		self.turnaround_times : List[float] = []
+
+	def run(self):
+		"""
+		Starts stages and blocks until stop() is called or Ctrl+C is pressed
+		:return:
+		"""
+		if not self.assistant.is_ready:
+			self.assistant.setup_assistant_workflow()
+
+		self.listener.on_speech_start = self.on_speech_start
+		self.listener.playback_active = self.speaker.is_busy
+		self.speaker.on_playback_start = self.on_playback_start
+		self.assistant.wait_for_speech = False
+
+		stages = [
+				threading.Thread(target=self.capture_stage, daemon=True),
+				threading.Thread(target=self.think_stage, daemon=True)
+		]
+		for stage in stages:
+			stage.start()
+		model_registry.registry.start_reaper(max_idle=MODEL_MAX_IDLE)
+
+		try:
+			while not self.stop_event.is_set():
+				self.stop_event.wait(0.5)
+		except KeyboardInterrupt:
+			self.stop()
+		finally:
+			self.stop()
+			for stage in stages:
+				# Let a transcription or generation in flight notice stop_event before models go away
+				stage.join(timeout=2)
+			self.shutdown()
+
+	def stop(self):
+		self.stop_event.set()
+		self.assistant.cancel_event.set()
+		self.speaker.stop()
+
+	def shutdown(self):
+		"""
+		Hands models back to the registry and unloads them, called once run() returns
+		:return:
+		"""
+		self.stop()
+		self.listener.cleanup()
+		self.speaker.cleanup()
+		model_registry.registry.evict_idle(0)
+
+	def capture_stage(self):
+		while not self.stop_event.is_set():
+			try:
+				rec_text = self.assistant.listen()
+			except Exception as e:
+				print(e)
+				continue
+			if rec_text.strip():
+				# Counted from end of speech, so transcription is part of the turn-around
+				speech_ended_at = self.listener.speech_ended_at or time.perf_counter()
+				self.utterance_queue.put((rec_text, speech_ended_at))
+
+	def think_stage(self):
+		while not self.stop_event.is_set():
+			try:
+				rec_text, speech_ended_at = self.utterance_queue.get(timeout=0.5)
+			except queue.Empty:
+				continue
+			self.turn_started = speech_ended_at
+			self.assistant.cancel_event.clear()
+			self.generating.set()
+			try:
+				self.assistant.invoke_workflow(rec_text)
+			except Exception as e:
+				print(e)
+				self.speaker.enqueue("Error Encountered")
+			finally:
+				self.generating.clear()
+
+	def on_speech_start(self):
+		"""
+		Barge-in, user started talking while a reply is being generated or played
+		:return:
+		"""
+		if self.generating.is_set() or self.speaker.is_busy():
+			print("Barge-in detected, stopping current reply")
+			self.assistant.cancel_event.set()
+			self.speaker.stop()
+
+	def on_playback_start(self):
+		"""
+		Records time between end of user's speech and first audio of the reply
+		:return:
+		"""
+		if self.turn_started is None:
+			return
+		turnaround = time.perf_counter() - self.turn_started
+		self.turn_started = None
+		self.turnaround_times.append(turnaround)
+		average = sum(self.turnaround_times) / len(self.turnaround_times)
+		print(f"Turn-around : {turnaround:.2f}s (average {average:.2f}s over {len(self.turnaround_times)} turns)")
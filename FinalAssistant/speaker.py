@@ -1,7 +1,11 @@
-import torch
 from TTS.api import TTS
-import os
-from playsound import playsound
+import re
+import queue
+import threading
+import numpy as np
+import sounddevice as sd
+
+import model_registry
 
 sample_text = """So um mm [laughs], this is interesting. You want me to speak in my native language right? 
 I hope this voice is more humane to you 
@@ -11,25 +15,170 @@ I will be the assistant's voice"""
 class Speaker:
 	def __init__(self):
 		self.tts : TTS = None
+		# "stream" synthesizes sentence by sentence and plays each one as soon as it is ready,
+		# "full" renders whole reply in memory before playing it
+		self.speak_mode = "stream"
+		# Set to a path to also write every full reply to disk, for debugging only
+		self.dump_path : str = None
+
+		# Reused between replies, grows only when a longer reply comes in
+		self.output_buffer = np.zeros(0, dtype=np.float32)
+		self.playback_lock = threading.Lock()
+
+		self.sentence_queue = queue.Queue()
+		self.audio_queue = queue.Queue()
+		self.synthesis_thread : threading.Thread = None
+		self.playback_thread : threading.Thread = None
+		# Bumped by stop(), audio rendered for an older generation is thrown away
+		self.generation = 0
+		# Optional callable invoked whenever a waveform starts playing
+		self.on_playback_start = None
 
 	def initialize_tts(self):
 		"""
 		Initializes tts engine
 		:return:
 		"""
-		os.environ["TORCH_FORCE_NO_WEIGHTS_ONLY_LOAD"] = "1"
-		device = "cuda" if torch.cuda.is_available() else "cpu"
-		self.tts = TTS("tts_models/en/ek1/tacotron2").to(device)
+		self.tts = model_registry.acquire_tts("tts_models/en/ek1/tacotron2")
 
-	def transform_text_to_speech(self, text : str):
+	def warm_up(self):
 		"""
-		Creates audio file 'output.wav' for given text
+		Loads TTS engine and synthesizes a short phrase, so first reply isn't slower
+		:return:
+		"""
+		if self.tts is None:
+			self.initialize_tts()
+		self.tts.tts(text="Ready.")
+
+	def transform_text_to_speech(self, text : str) -> np.ndarray:
+		"""
+		Synthesizes speech for given text into output_buffer
 		:param text:
+		:return: view of output_buffer holding the samples (valid until next call)
+		"""
+		if self.tts is None:
+			self.initialize_tts()
+		wav = self.tts.tts(text=text)
+
+		frames = len(wav)
+		if frames > len(self.output_buffer):
+			self.output_buffer = np.zeros(frames, dtype=np.float32)
+		samples = self.output_buffer[:frames]
+		samples[:] = wav
+
+		if self.dump_path is not None:
+			self.tts.synthesizer.save_wav(wav=samples, path=self.dump_path)
+		return samples
+
+	def play(self, samples : np.ndarray):
+		"""
+		Plays samples on default output device, one playback at a time
+		:param samples:
+		:return:
+		"""
+		with self.playback_lock:
+			if self.on_playback_start is not None:
+				self.on_playback_start()
+			sd.play(samples, self.tts.synthesizer.output_sample_rate)
+			sd.wait()
+
+	@staticmethod
+	def split_sentences(text : str):
+		"""
+		Splits text on sentence endings and line breaks
+		:param text:
+		:return: list of non-empty sentences
+		"""
+		parts = re.split(r"(?<=[.!?;:])\s+|\n+", text)
+		return [part.strip() for part in parts if part and part.strip()]
+
+	def start_pipeline(self):
+		"""
+		Starts synthesis and playback workers, if not already running
 		:return:
 		"""
 		if self.tts is None:
 			self.initialize_tts()
-		self.tts.tts_to_file(text=text, file_path="output.wav")
+		if self.synthesis_thread is None or not self.synthesis_thread.is_alive():
+			self.synthesis_thread = threading.Thread(target=self.synthesis_worker, daemon=True)
+			self.synthesis_thread.start()
+		if self.playback_thread is None or not self.playback_thread.is_alive():
+			self.playback_thread = threading.Thread(target=self.playback_worker, daemon=True)
+			self.playback_thread.start()
+
+	def synthesis_worker(self):
+		while True:
+			sentence = self.sentence_queue.get()
+			generation = self.generation
+			try:
+				wav = self.tts.tts(text=sentence)
+				if generation == self.generation:
+					self.audio_queue.put((generation, np.asarray(wav, dtype=np.float32)))
+			except Exception as e:
+				print(e)
+			finally:
+				self.sentence_queue.task_done()
+
+	def playback_worker(self):
+		while True:
+			generation, wav = self.audio_queue.get()
+			try:
+				if generation == self.generation:
+					self.play(wav)
+			except Exception as e:
+				print(e)
+			finally:
+				self.audio_queue.task_done()
+
+	def enqueue(self, sentence : str):
+		"""
+		Queues a sentence for synthesis, it gets played as soon as it is rendered
+		while following sentences are synthesized in background
+		:param sentence:
+		:return:
+		"""
+		self.start_pipeline()
+		self.sentence_queue.put(sentence)
+
+	def wait_until_done(self):
+		"""
+		Blocks until every queued sentence has been synthesized and played
+		:return:
+		"""
+		self.sentence_queue.join()
+		self.audio_queue.join()
+
+	def is_busy(self) -> bool:
+		"""
+		Whether any sentence is still waiting to be synthesized or played
+		:return:
+		"""
+		return self.sentence_queue.unfinished_tasks > 0 or self.audio_queue.unfinished_tasks > 0
+
+	def stop(self):
+		"""
+		Interrupts current playback and drops every queued sentence
+		:return:
+		"""
+		self.generation += 1
+		for pending in (self.sentence_queue, self.audio_queue):
+			while True:
+				try:
+					pending.get_nowait()
+				except queue.Empty:
+					break
+				pending.task_done()
+		sd.stop()
+
+	def speak_streaming(self, text : str):
+		"""
+		Plays first sentence while rest of the reply is still being synthesized
+		:param text:
+		:return:
+		"""
+		for sentence in self.split_sentences(text):
+			self.enqueue(sentence)
+		self.wait_until_done()
 
 	def speak(self, text : str):
 		"""
@@ -37,8 +186,17 @@ class Speaker:
 		:param text:
 		:return:
 		"""
-		self.transform_text_to_speech(text)
-		playsound("./output.wav")
+		if self.speak_mode == "stream":
+			self.speak_streaming(text)
+			return
+		self.play(self.transform_text_to_speech(text))
 
 	def cleanup(self):
-		pass
\ No newline at end of file
+		"""
+		Stops playback and hands TTS model back to registry
+		:return:
+		"""
+		self.stop()
+		if self.tts is not None:
+			model_registry.release(self.tts)
+			self.tts = None
\ No newline at end of file
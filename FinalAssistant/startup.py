@@ -0,0 +1,68 @@
+import threading
+import time
+from typing import Callable, Dict
+
+class StartupManager:
+	"""
+	Loads components in parallel threads and exposes a readiness barrier.
+
+	Each component is a callable which loads (and warms up) one model.
+	Load time of every component is recorded, so slow starts can be traced.
+	"""
+	def __init__(self):
+		self.components : Dict[str, Callable] = {}
+		self.timings : Dict[str, float] = {}
+		self.errors : Dict[str, Exception] = {}
+		self.threads : Dict[str, threading.Thread] = {}
+		self.started_at : float = None
+		self.total_time : float = None
+
+	def add(self, name: str, loader: Callable):
+		self.components[name] = loader
+
+	def load(self, name: str):
+		start = time.perf_counter()
+		try:
+			self.components[name]()
+		except Exception as e:
+			print(f"Failed to load {name} : {e}")
+			self.errors[name] = e
+		finally:
+			self.timings[name] = time.perf_counter() - start
+
+	def start(self):
+		"""
+		Starts loading every component, returns immediately
+		:return:
+		"""
+		self.started_at = time.perf_counter()
+		for name in self.components:
+			thread = threading.Thread(target=self.load, args=(name,), daemon=True)
+			self.threads[name] = thread
+			thread.start()
+
+	def is_ready(self) -> bool:
+		return bool(self.threads) and all(not thread.is_alive() for thread in self.threads.values())
+
+	def wait_until_ready(self, timeout: float = None) -> bool:
+		"""
+		Readiness barrier, blocks until every component finished loading
+		:param timeout: seconds to wait for all components together
+		:return: True if all components loaded without errors
+		"""
+		deadline = None if timeout is None else time.perf_counter() + timeout
+		for thread in self.threads.values():
+			remaining = None if deadline is None else max(0.0, deadline - time.perf_counter())
+			thread.join(remaining)
+		if not self.is_ready():
+			return False
+		if self.total_time is None:
+			self.total_time = time.perf_counter() - self.started_at
+		return not self.errors
+
+	def report(self):
+		for name, seconds in self.timings.items():
+			status = "failed" if name in self.errors else "ready"
+			print(f"{name:<10} {status:<7} {seconds:.2f}s")
+		if self.total_time is not None:
+			print(f"{'startup':<10} {'total':<7} {self.total_time:.2f}s")
@@ -0,0 +1,138 @@
+import threading
+import time
+import re
+from typing import List, Tuple
+import numpy as np
+from faster_whisper import WhisperModel
+
+# (start seconds, end seconds, text) of a single transcribed word
+Word = Tuple[float, float, str]
+
+class StreamingTranscriber:
+	"""
+	Transcribes an utterance incrementally while it is still being recorded.
+
+	Audio is appended by the recorder, and a worker thread re-transcribes the
+	rolling window starting at the last committed word. A word is committed
+	once two consecutive hypotheses agree on it (local agreement), everything
+	after that is kept as tentative text and may still change.
+	"""
+	def __init__(self, model: WhisperModel, samplerate: int = 16000, max_duration: float = 20,
+	             step_duration: float = 0.5, max_window_duration: float = 10):
+		self.model = model
+		self.samplerate = samplerate
+		self.step_frames = int(step_duration * samplerate)
+		self.max_window_frames = int(max_window_duration * samplerate)
+
+		self.audio = np.zeros(int(max_duration * samplerate), dtype=np.float32)
+		self.frames_written = 0
+		self.window_start = 0
+		self.processed_until = 0
+
+		self.committed_words : List[Word] = []
+		self.tentative_words : List[Word] = []
+
+		self.stop_event = threading.Event()
+		self.worker : threading.Thread = None
+
+	@property
+	def committed_text(self) -> str:
+		return "".join(word for _, _, word in self.committed_words).strip()
+
+	@property
+	def tentative_text(self) -> str:
+		return "".join(word for _, _, word in self.tentative_words).strip()
+
+	def append(self, block: np.ndarray):
+		"""
+		Adds recorded audio to the utterance, called from recording thread
+		:param block: mono float32 samples
+		:return:
+		"""
+		start = self.frames_written
+		end = min(start + len(block), len(self.audio))
+		self.audio[start:end] = block[:end - start]
+		self.frames_written = end
+
+	def start(self):
+		self.stop_event.clear()
+		self.worker = threading.Thread(target=self.run, daemon=True)
+		self.worker.start()
+
+	def stop(self):
+		self.stop_event.set()
+		if self.worker is not None:
+			self.worker.join()
+			self.worker = None
+
+	def run(self):
+		while not self.stop_event.is_set():
+			if self.frames_written - self.processed_until >= self.step_frames:
+				self.process_window()
+			else:
+				time.sleep(0.05)
+
+	def finish(self) -> str:
+		"""
+		Stops the worker and commits whatever remains in the window
+		:return: final transcript of the utterance
+		"""
+		self.stop()
+		if self.frames_written > self.processed_until or self.tentative_words:
+			self.process_window(final=True)
+		return self.committed_text
+
+	def transcribe_window(self, start: int, end: int) -> List[Word]:
+		offset = start / self.samplerate
+		segments, _ = self.model.transcribe(
+				self.audio[start:end],
+				language="en",
+				beam_size=1,  # Max Speed
+				word_timestamps=True,
+				condition_on_previous_text=False,
+				initial_prompt=self.committed_text[-200:] or None
+		)
+		words = []
+		for segment in segments:
+			for word in segment.words or []:
+				words.append((word.start + offset, word.end + offset, word.word))
+		return words
+
+	def process_window(self, final: bool = False):
+		end = self.frames_written
+		hypothesis = self.transcribe_window(self.window_start, end)
+		self.processed_until = end
+
+		if final:
+			agreed = len(hypothesis)
+		else:
+			agreed = self.agreed_prefix_length(self.tentative_words, hypothesis)
+			# Window grew too long without agreement, force commit of its older part
+			if end - self.window_start > self.max_window_frames:
+				horizon = (end - self.max_window_frames // 2) / self.samplerate
+				while agreed < len(hypothesis) and hypothesis[agreed][1] <= horizon:
+					agreed += 1
+
+		self.committed_words.extend(hypothesis[:agreed])
+		self.tentative_words = hypothesis[agreed:]
+
+		if agreed:
+			self.window_start = min(end, int(hypothesis[agreed - 1][1] * self.samplerate))
+
+	@staticmethod
+	def normalize(word: str) -> str:
+		return re.sub(r"[^\w']", "", word.lower())
+
+	def agreed_prefix_length(self, previous: List[Word], current: List[Word]) -> int:
+		"""
+		Length of longest common word prefix between two consecutive hypotheses
+		:param previous:
+		:param current:
+		:return:
+		"""
+		agreed = 0
+		for (_, _, old), (_, _, new) in zip(previous, current):
+			if self.normalize(old) != self.normalize(new):
+				break
+			agreed += 1
+		return agreed
@@ -1,4 +1,5 @@
 import os
+import io
 import asyncio
 import pyaudio
 import struct
@@ -6,17 +7,21 @@ import webbrowser
 import pygame
 import speech_recognition as sr
 from dotenv import load_dotenv
-from faster_whisper import WhisperModel
 from google import genai
 from google.genai import types
 import edge_tts
 import pvporcupine
 
+# FinalAssistant modules are imported as a package, run this from the repo root: python -m advanced_one.main
+from FinalAssistant.model_registry import acquire_whisper
+
 
 # --- Configuration ---
 load_dotenv()
 GEMINI_KEY = os.getenv("GOOGLE_API_KEY")
 PICOVOICE_KEY = os.getenv("PICOVOICE_API_KEY")
+# Set to a file path to also write every reply to disk, for debugging only
+REPLY_DUMP_PATH = os.getenv("REPLY_DUMP_PATH")
 
 # -- Tools Definition ---
 
@@ -34,10 +39,12 @@ client = genai.Client(api_key=GEMINI_KEY)
 
 # Whisper model
 print("Loading Whisper Model")
-whisper_model = WhisperModel("base.en", device="cpu", compute_type="int8")
+whisper_model = acquire_whisper("base.en", device="cpu", compute_type="int8")
 
 # TTS Setup
 pygame.mixer.init()
+# Reused for every reply, so replies never touch the disk
+reply_buffer = io.BytesIO()
 
 # --- 3. HELPER FUNCTIONS ---
 
@@ -46,9 +53,20 @@ async def speak(text: str):
     print(f"Jarvis: {text}")
     voice = "en-GB-RyanNeural"  # Crisp male voice
     communicate = edge_tts.Communicate(text, voice)
-    await communicate.save("reply.mp3")
 
-    pygame.mixer.music.load("reply.mp3")
+    pygame.mixer.music.unload()
+    reply_buffer.seek(0)
+    reply_buffer.truncate()
+    async for chunk in communicate.stream():
+        if chunk["type"] == "audio":
+            reply_buffer.write(chunk["data"])
+    reply_buffer.seek(0)
+
+    if REPLY_DUMP_PATH:
+        with open(REPLY_DUMP_PATH, "wb") as f:
+            f.write(reply_buffer.getbuffer())
+
+    pygame.mixer.music.load(reply_buffer, "mp3")
     pygame.mixer.music.play()
     while pygame.mixer.music.get_busy():
         await asyncio.sleep(0.1)
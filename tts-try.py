@@ -1,8 +1,7 @@
 import torch
-from TTS.api import TTS
-import os
 
-os.environ["TORCH_FORCE_NO_WEIGHTS_ONLY_LOAD"] = "1"
+# FinalAssistant modules are imported as a package, run this from the repo root
+from FinalAssistant.model_registry import acquire_tts
 
 # Get device
 # device = "cuda" if torch.cuda.is_available() else "cpu"
@@ -14,7 +13,7 @@ device = "cuda" if torch.cuda.is_available() else "cpu"
 
 # Init TTS
 # tts = TTS("tts_models/multilingual/multi-dataset/xtts_v2").to(device)
-tts = TTS("tts_models/en/ek1/tacotron2").to(device)
+tts = acquire_tts("tts_models/en/ek1/tacotron2", device)
 
 # Run TTS
 # ❗ Since this model is multi-lingual voice cloning model, we must set the target speaker_wav and language
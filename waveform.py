@@ -1,12 +1,19 @@
 import sounddevice as sd
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.animation import FuncAnimation
+
+from FinalAssistant.ring_buffer import AudioRingBuffer
 
 # Settings
 duration = 10  # seconds
 samplerate = 44100
 window_size = 1024
 
+# Callback only copies samples into ring buffer, drawing happens on main thread
+audio_ring = AudioRingBuffer(window_size * 8)
+window = np.zeros(window_size, dtype=np.float32)
+
 # Set up the plot
 fig, ax = plt.subplots()
 x = np.arange(0, window_size)
@@ -14,16 +21,22 @@ line, = ax.plot(x, np.zeros(window_size))
 ax.set_ylim([-1, 1])
 ax.set_xlim([0, window_size])
 
-# Callback to update waveform
+# Callback to capture waveform
 def audio_callback(indata, frames, time, status):
     if status:
         print(status)
-    line.set_ydata(indata[:, 0])
-    plt.draw()
-    plt.pause(0.001)
+    # Visualizer only needs newest audio, so drop whatever was already drawn
+    audio_ring.advance(audio_ring.readable())
+    audio_ring.write(indata[:, 0])
+
+def update_plot(frame):
+    audio_ring.latest_into(window)
+    line.set_ydata(window)
+    return line,
 
 print("🎙️ Speak into the microphone...")
 
 # Use blocking stream in main thread
-with sd.InputStream(callback=audio_callback, channels=1, samplerate=samplerate, blocksize=window_size):
+with sd.InputStream(callback=audio_callback, channels=1, samplerate=samplerate, blocksize=window_size, dtype="float32"):
+    animation = FuncAnimation(fig, update_plot, interval=30, blit=True, cache_frame_data=False)
     plt.show()